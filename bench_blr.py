@@ -0,0 +1,80 @@
+"""
+Microbenchmark for blrObjFunction
+
+Compares the vectorized blrObjFunction in mlp3/objectives.py against the original
+per-row loop on random MNIST-shaped data (no mnist_all.mat needed).
+
+Usage: python bench_blr.py [n_data] [n_features] [repeats]
+"""
+import sys
+import time
+
+import numpy as np
+
+from mlp3.objectives import sigmoid, blrObjFunction
+
+
+def blrObjFunctionLoop(initialWeights, *args):
+    """
+    The original per-row implementation of blrObjFunction, kept here as the
+    reference for correctness and timing.
+    """
+    train_data, labeli = args
+
+    n_data = train_data.shape[0]
+    n_features = train_data.shape[1]
+    error = 0
+
+    run_sum = np.zeros((n_features + 1, 1))
+    for i in range(0, n_data):
+        x_bias = np.hstack((1, train_data[i]))
+        theta = sigmoid(np.dot(initialWeights, x_bias))
+        error_i = np.multiply((theta - labeli[i][0]), np.transpose(x_bias))
+        error_i = error_i.reshape(error_i.shape[0], 1)
+        run_sum = np.add(run_sum, error_i)
+    error_grad = run_sum / n_data
+    error_grad = np.squeeze(np.asarray(error_grad))
+
+    for n in range(0, n_data):
+        appended_data = np.hstack((1, train_data[n]))
+        theta_n = sigmoid(np.dot(initialWeights, appended_data))
+        first_part = labeli[n] * np.log(theta_n)
+        second_part = (1 - labeli[n]) * np.log(1 - theta_n)
+        error += (first_part + second_part)
+
+    error /= -1 * n_data
+
+    return error, error_grad
+
+
+def best_time(fn, args, repeats):
+    best = float("inf")
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn(*args)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+if __name__ == "__main__":
+    n_data = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    n_features = int(sys.argv[2]) if len(sys.argv) > 2 else 717
+    repeats = int(sys.argv[3]) if len(sys.argv) > 3 else 3
+
+    rng = np.random.RandomState(0)
+    train_data = rng.rand(n_data, n_features)
+    labeli = (rng.rand(n_data, 1) > 0.9).astype(float)
+    weights = 0.01 * rng.randn(n_features + 1)
+    args = (weights, train_data, labeli)
+
+    loop_error, loop_grad = blrObjFunctionLoop(*args)
+    vec_error, vec_grad = blrObjFunction(*args)
+    print("max |error diff|:", np.max(np.abs(loop_error - vec_error)))
+    print("max |grad diff| :", np.max(np.abs(loop_grad - vec_grad)))
+
+    loop_time = best_time(blrObjFunctionLoop, args, repeats)
+    vec_time = best_time(blrObjFunction, args, repeats)
+    print("N = %d, D = %d" % (n_data, n_features))
+    print("per-row loop: %.4f s" % loop_time)
+    print("vectorized  : %.4f s" % vec_time)
+    print("speedup     : %.1fx" % (loop_time / vec_time))
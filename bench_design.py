@@ -0,0 +1,76 @@
+"""
+Memory benchmark for the bias-augmented DesignMatrix
+
+Measures, with tracemalloc, the peak memory allocated by one call of each
+objective and predict function when it is given a plain N x D array (which is
+augmented with the bias column on every call) versus a DesignMatrix built
+once up front. Uses random MNIST-shaped data, so mnist_all.mat is not needed.
+
+Usage: python bench_design.py [n_data] [n_features]
+"""
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+
+from mlp3.data import DesignMatrix
+from mlp3.objectives import blrObjFunction, mlrObjFunction
+from mlp3.predict import blrPredict, mlrPredict
+
+
+def profile_call(fn, args, repeats=5):
+    """Returns (peak bytes allocated during one call, best wall time)"""
+    fn(*args)
+    tracemalloc.start()
+    fn(*args)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    best = float("inf")
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn(*args)
+        best = min(best, time.perf_counter() - start)
+    return peak, best
+
+
+if __name__ == "__main__":
+    n_data = int(sys.argv[1]) if len(sys.argv) > 1 else 50000
+    n_features = int(sys.argv[2]) if len(sys.argv) > 2 else 717
+    n_class = 10
+
+    rng = np.random.RandomState(0)
+    train_data = rng.rand(n_data, n_features)
+    train_label = rng.randint(0, n_class, n_data)
+    Y = np.eye(n_class)[train_label]
+    design = DesignMatrix(train_data)
+
+    w = 0.01 * rng.randn(n_features + 1)
+    W = 0.01 * rng.randn(n_features + 1, n_class)
+    predict_rows = min(n_data, 2000)
+
+    cases = [
+        ("blrObjFunction", blrObjFunction,
+         lambda data: (w, data, Y[:, :1])),
+        ("mlrObjFunction", mlrObjFunction,
+         lambda data: (W.ravel(), data, Y, n_class)),
+        ("blrPredict (%d rows)" % predict_rows, blrPredict,
+         lambda data: (W, data)),
+        ("mlrPredict (%d rows)" % predict_rows, mlrPredict,
+         lambda data: (W, data)),
+    ]
+
+    print("N = %d, D = %d, one copy of the data = %.1f MB"
+          % (n_data, n_features, train_data.nbytes / 1e6))
+    print("%-24s %14s %14s %10s %10s" % ("function", "ndarray peak", "design peak",
+                                         "ndarray s", "design s"))
+    for name, fn, make_args in cases:
+        if "Predict" in name:
+            raw, cached = train_data[:predict_rows], DesignMatrix(train_data[:predict_rows])
+        else:
+            raw, cached = train_data, design
+        raw_peak, raw_time = profile_call(fn, make_args(raw))
+        cached_peak, cached_time = profile_call(fn, make_args(cached))
+        print("%-24s %11.1f MB %11.1f MB %10.4f %10.4f"
+              % (name, raw_peak / 1e6, cached_peak / 1e6, raw_time, cached_time))
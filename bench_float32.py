@@ -0,0 +1,55 @@
+"""
+Accuracy-parity report for the float32 mode
+
+Trains the one-vs-all Logistic Regression model of mlp3 with float64
+and with float32 data, and prints the train/validation/test accuracy and
+training time of both next to the float64 baseline recorded in output.txt.
+
+Usage: python bench_float32.py [mat_file] [maxiter]
+"""
+import os
+import re
+import sys
+import time
+
+import numpy as np
+
+from mlp3.data import MNIST_FILE, preprocess
+from mlp3.metrics import accuracy
+from mlp3.predict import blrPredict
+from mlp3.train import trainOneVsAll
+
+
+def baselineAccuracy(path=os.path.join(os.path.dirname(os.path.abspath(__file__)), 'output.txt')):
+    """Returns {'Training': .., 'Validation': .., 'Testing': ..} from output.txt"""
+    with open(path) as f:
+        text = f.read()
+    return dict((name, float(value)) for name, value in
+                re.findall(r'(Training|Validation|Testing) set Accuracy:([0-9.]+)%', text))
+
+
+if __name__ == "__main__":
+    mat_file = sys.argv[1] if len(sys.argv) > 1 else MNIST_FILE
+    maxiter = int(sys.argv[2]) if len(sys.argv) > 2 else 100
+
+    results = {}
+    for dtype in (np.float64, np.float32):
+        train_data, train_label, validation_data, validation_label, test_data, test_label = \
+            preprocess(design=True, mat_file=mat_file, dtype=dtype)
+        Y = (train_label == np.arange(10)).astype(np.float64)
+        start = time.perf_counter()
+        W = trainOneVsAll(train_data, Y, opts={'maxiter': maxiter})
+        fit_time = time.perf_counter() - start
+        results[np.dtype(dtype).name] = (accuracy(train_label, blrPredict(W, train_data)),
+                                         accuracy(validation_label, blrPredict(W, validation_data)),
+                                         accuracy(test_label, blrPredict(W, test_data)),
+                                         fit_time)
+
+    baseline = baselineAccuracy()
+    print("%-10s %10s %12s %10s %10s" % ("", "train %", "validation %", "test %", "fit (s)"))
+    print("%-10s %10.2f %12.2f %10.2f %10s" % ("output.txt", baseline['Training'],
+                                               baseline['Validation'], baseline['Testing'], "-"))
+    for name, (train_acc, validation_acc, test_acc, fit_time) in results.items():
+        print("%-10s %10.2f %12.2f %10.2f %10.1f" % (name, train_acc, validation_acc, test_acc, fit_time))
+    delta = np.subtract(results['float32'][:3], results['float64'][:3])
+    print("float32 - float64: train %+.2f, validation %+.2f, test %+.2f points" % tuple(delta))
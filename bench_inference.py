@@ -0,0 +1,106 @@
+"""
+Load generator for inference_server.py
+
+Starts the server in-process on a local port, once without micro-batching
+(batches of one request) and once per max_latency_ms setting, and has
+n_clients threads each send n_requests single-image POST /predict requests
+over keep-alive connections. Prints p50/p99 latency, throughput and the mean
+micro-batch size of each setting; a client error fails the run instead.
+Without a model path, a random 10-class model over MNIST-shaped images is
+used.
+
+Usage: python bench_inference.py [model_path | ""] [n_clients] [n_requests]
+"""
+import http.client
+import json
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import time
+
+import numpy as np
+
+from mlp3.inference_server import makeServer
+from mlp3.model_registry import saveModel
+
+SETTINGS = ((1, 0.0), (256, 0.5), (256, 2.0), (256, 5.0))
+
+
+def client(port, images, latencies, errors):
+    try:
+        _requests(port, images, latencies)
+    except Exception as e:
+        errors.append(e)
+
+
+def _requests(port, images, latencies):
+    connection = http.client.HTTPConnection('127.0.0.1', port)
+    for image in images:
+        body = json.dumps({'pixels': image.tolist()}).encode('utf-8')
+        start = time.perf_counter()
+        connection.request('POST', '/predict', body, {'Content-Type': 'application/json'})
+        response = connection.getresponse()
+        response.read()
+        latencies.append(time.perf_counter() - start)
+        if response.status != 200:
+            raise RuntimeError("server answered %d" % response.status)
+    connection.close()
+
+
+def run(model_path, max_batch_size, max_latency_ms, n_clients, n_requests, seed=0):
+    """Returns (latencies in seconds, wall time, mean batch size) of one load test"""
+    server = makeServer(model_path, ('127.0.0.1', 0), max_batch_size, max_latency_ms)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        rng = np.random.RandomState(seed)
+        latencies = [[] for _ in range(n_clients)]
+        errors = []
+        clients = [threading.Thread(target=client, args=(server.server_address[1],
+                                                         rng.randint(0, 256, (n_requests, 784)), latencies[i],
+                                                         errors))
+                   for i in range(n_clients)]
+        start = time.perf_counter()
+        for t in clients:
+            t.start()
+        for t in clients:
+            t.join()
+        wall = time.perf_counter() - start
+        batch_size = server.batcher.rows / max(server.batcher.batches, 1)
+    finally:
+        server.shutdown()
+        server.server_close()
+        server.batcher.close()
+    if errors:
+        # The figures of the clients that finished would not be comparable
+        raise RuntimeError("%d of %d clients failed; first error: %r" % (len(errors), n_clients, errors[0]))
+    return np.concatenate(latencies), wall, batch_size
+
+
+if __name__ == "__main__":
+    model_path = sys.argv[1] if len(sys.argv) > 1 and sys.argv[1] else None
+    n_clients = int(sys.argv[2]) if len(sys.argv) > 2 else 32
+    n_requests = int(sys.argv[3]) if len(sys.argv) > 3 else 200
+
+    tmp_dir = None
+    if model_path is None:
+        tmp_dir = tempfile.mkdtemp(prefix='bench-inference-')
+        model_path = os.path.join(tmp_dir, 'random.model')
+        rng = np.random.RandomState(0)
+        index = np.flatnonzero(rng.rand(784) < 0.9)
+        saveModel(model_path, rng.randn(index.size + 1, 10), 'mlr', index)
+
+    try:
+        print("%d clients x %d requests" % (n_clients, n_requests))
+        print("%10s %12s %10s %10s %12s %11s" % ("max batch", "latency ms", "p50 ms", "p99 ms",
+                                               "requests/s", "mean batch"))
+        for max_batch_size, max_latency_ms in SETTINGS:
+            latencies, wall, batch_size = run(model_path, max_batch_size, max_latency_ms, n_clients, n_requests)
+            print("%10d %12.1f %10.2f %10.2f %12.0f %11.1f" % (
+                max_batch_size, max_latency_ms, 1e3 * np.percentile(latencies, 50),
+                1e3 * np.percentile(latencies, 99), latencies.size / wall, batch_size))
+    finally:
+        if tmp_dir is not None:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
@@ -0,0 +1,69 @@
+"""
+Accuracy vs fit time of the approximate RBF SVM against the exact one
+
+Fits the exact RBF SVC of mlp3 on n_train training rows drawn at random
+(preprocess returns the training split sorted by class, so its first rows
+hold only the first digits), then the linear SVM on random Fourier features
+and on Nystroem features for a range of feature counts, and prints
+validation/test accuracy, fit time and predict time of each, followed by a
+text chart of test accuracy against fit time. The same rows are written to
+a CSV file when a path is given.
+
+Usage: python bench_kernel_approx.py [mat_file] [n_train] [gamma] [csv_path]
+"""
+import csv
+import sys
+
+import numpy as np
+
+from mlp3.data import MNIST_FILE, preprocess
+from mlp3.kernel_approx import approxRBFResults
+from mlp3.svm_sweep import formatTable, sweepSVC
+
+N_COMPONENTS = (250, 500, 1000, 2000, 4000)
+COLUMNS = ['kernel', 'n_components', 'validation_accuracy', 'test_accuracy', 'fit_time', 'predict_time']
+
+
+def chart(results, width=50):
+    """Text chart of test accuracy (bar) with fit time, one row per result"""
+    low = min(r['test_accuracy'] for r in results) - 1
+    high = max(r['test_accuracy'] for r in results)
+    lines = []
+    for r in sorted(results, key=lambda r: r['fit_time']):
+        bar = int(round(width * (r['test_accuracy'] - low) / max(high - low, 1e-9)))
+        lines.append("%-14s %6s %8.2fs |%-*s %.2f%%" % (r['kernel'], r['n_components'], r['fit_time'],
+                                                       width, '#' * bar, r['test_accuracy']))
+    return '\n'.join(lines)
+
+
+if __name__ == "__main__":
+    mat_file = sys.argv[1] if len(sys.argv) > 1 else MNIST_FILE
+    n_train = int(sys.argv[2]) if len(sys.argv) > 2 else 10000
+    gamma = sys.argv[3] if len(sys.argv) > 3 else 'auto'
+    csv_path = sys.argv[4] if len(sys.argv) > 4 else None
+    if gamma != 'auto':
+        gamma = float(gamma)
+
+    train_data, train_label, validation_data, validation_label, test_data, test_label = \
+        preprocess(mat_file=mat_file)
+    rows = np.sort(np.random.RandomState(0).permutation(train_data.shape[0])[:n_train])
+    X, y = train_data[rows], train_label[rows].ravel()
+    eval_sets = [('validation', validation_data, validation_label), ('test', test_data, test_label)]
+
+    results = sweepSVC(X, y, [{'kernel': 'rbf', 'gamma': gamma, 'C': 1.0}], eval_sets=eval_sets)
+    results[0]['n_components'] = '-'
+    configs = [{'method': method, 'gamma': gamma, 'n_components': n, 'C': 1.0}
+               for method in ('rff', 'nystroem') for n in N_COMPONENTS
+               if method == 'rff' or n <= X.shape[0]]
+    results += approxRBFResults(X, y, configs, eval_sets=eval_sets)
+
+    print("N = %d, D = %d, gamma = %s" % (X.shape[0], X.shape[1], gamma))
+    print(formatTable(results, COLUMNS))
+    print()
+    print(chart(results))
+
+    if csv_path is not None:
+        with open(csv_path, 'w', newline='') as f:
+            writer = csv.DictWriter(f, COLUMNS, extrasaction='ignore')
+            writer.writeheader()
+            writer.writerows(results)
@@ -0,0 +1,48 @@
+"""
+Accuracy parity of the liblinear linear SVM with SVC's linear kernel
+
+Fits SVC(kernel='linear') through sweepSVC and trainLinearSVM through
+linearSVMResults on n_train training rows drawn at random (preprocess
+returns the training split sorted by class, so its first rows hold only the
+first digits), and prints the accuracy on every split and the fit time of
+each. When the liblinear accuracy on any split falls more than max_gap
+points below SVC's, the check fails and the script exits with status 1.
+
+Usage: python bench_linear_svm.py [mat_file] [n_train] [max_gap]
+"""
+import sys
+
+import numpy as np
+
+from mlp3.data import MNIST_FILE, preprocess
+from mlp3.svm_sweep import formatTable, linearSVMResults, sweepSVC
+
+SETS = ('train', 'validation', 'test')
+
+
+if __name__ == "__main__":
+    mat_file = sys.argv[1] if len(sys.argv) > 1 else MNIST_FILE
+    n_train = int(sys.argv[2]) if len(sys.argv) > 2 else 12000
+    max_gap = float(sys.argv[3]) if len(sys.argv) > 3 else 1.0
+
+    train_data, train_label, validation_data, validation_label, test_data, test_label = \
+        preprocess(mat_file=mat_file)
+    rows = np.sort(np.random.RandomState(0).permutation(train_data.shape[0])[:n_train])
+    train_data, train_label = train_data[rows], train_label[rows]
+    eval_sets = [('train', train_data, train_label), ('validation', validation_data, validation_label),
+                 ('test', test_data, test_label)]
+
+    svc = sweepSVC(train_data, train_label, [{'kernel': 'linear', 'C': 1.0}], eval_sets=eval_sets)[0]
+    liblinear = linearSVMResults(train_data, train_label, C=1.0, eval_sets=eval_sets)
+    liblinear.pop('W')
+    print("%d training rows" % train_data.shape[0])
+    print(formatTable([svc, liblinear], ['kernel', 'C'] + [name + '_accuracy' for name in SETS]
+                      + ['fit_time', 'predict_time']))
+
+    gaps = dict((name, svc[name + '_accuracy'] - liblinear[name + '_accuracy']) for name in SETS)
+    failed = [name for name in SETS if gaps[name] > max_gap]
+    if failed:
+        print("liblinear is more than %.1f points below SVC on %s (%s)"
+              % (max_gap, ', '.join(failed), ', '.join('%.2f' % gaps[name] for name in failed)))
+        sys.exit(1)
+    print("liblinear within %.1f points of SVC on every split" % max_gap)
@@ -0,0 +1,132 @@
+"""
+Benchmark for preprocess()
+
+Measures the wall time and tracemalloc peak memory of building the
+train/validation/test splits, with the original loop-based implementation
+and with the vectorized one in mlp3/data.py. Training is not included.
+
+If the .mat file does not exist, a random MNIST-shaped one (60000 train and
+10000 test images of 28 x 28 uint8 pixels) is generated in a temporary
+directory, so the benchmark also runs offline.
+
+Usage: python bench_preprocess.py [mat_file]
+"""
+import os
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+from scipy.io import loadmat, savemat
+
+from mlp3.data import _buildSplits
+
+
+def preprocessLoop(mat_file):
+    """The original preprocess() body, kept as the reference implementation"""
+    mat = loadmat(mat_file)
+
+    n_feature = mat.get("train1").shape[1]
+    n_sample = 0
+    for i in range(10):
+        n_sample = n_sample + mat.get("train" + str(i)).shape[0]
+    n_validation = 1000
+    n_train = n_sample - 10 * n_validation
+
+    validation_data = np.zeros((10 * n_validation, n_feature))
+    for i in range(10):
+        validation_data[i * n_validation:(i + 1) * n_validation, :] = mat.get("train" + str(i))[0:n_validation, :]
+
+    validation_label = np.ones((10 * n_validation, 1))
+    for i in range(10):
+        validation_label[i * n_validation:(i + 1) * n_validation, :] = i * np.ones((n_validation, 1))
+
+    train_data = np.zeros((n_train, n_feature))
+    train_label = np.zeros((n_train, 1))
+    temp = 0
+    for i in range(10):
+        size_i = mat.get("train" + str(i)).shape[0]
+        train_data[temp:temp + size_i - n_validation, :] = mat.get("train" + str(i))[n_validation:size_i, :]
+        train_label[temp:temp + size_i - n_validation, :] = i * np.ones((size_i - n_validation, 1))
+        temp = temp + size_i - n_validation
+
+    n_test = 0
+    for i in range(10):
+        n_test = n_test + mat.get("test" + str(i)).shape[0]
+    test_data = np.zeros((n_test, n_feature))
+    test_label = np.zeros((n_test, 1))
+    temp = 0
+    for i in range(10):
+        size_i = mat.get("test" + str(i)).shape[0]
+        test_data[temp:temp + size_i, :] = mat.get("test" + str(i))
+        test_label[temp:temp + size_i, :] = i * np.ones((size_i, 1))
+        temp = temp + size_i
+
+    sigma = np.std(train_data, axis=0)
+    index = np.array([])
+    for i in range(n_feature):
+        if (sigma[i] > 0.001):
+            index = np.append(index, [i])
+    train_data = train_data[:, index.astype(int)]
+    validation_data = validation_data[:, index.astype(int)]
+    test_data = test_data[:, index.astype(int)]
+
+    train_data /= 255.0
+    validation_data /= 255.0
+    test_data /= 255.0
+
+    return train_data, train_label, validation_data, validation_label, test_data, test_label
+
+
+def writeSyntheticMat(path, seed=0, n_train=6000, n_test=1000):
+    """Writes a random MNIST-shaped .mat with n_train and n_test images per digit"""
+    rng = np.random.RandomState(seed)
+    # Border pixels are always zero, as in MNIST, so the std filter has work to do
+    active = np.zeros((28, 28), dtype=bool)
+    active[4:24, 4:24] = True
+    active = active.ravel()
+    blocks = {}
+    for name, n_images in (('train', n_train), ('test', n_test)):
+        for i in range(10):
+            block = rng.randint(0, 256, size=(n_images, 784)).astype(np.uint8)
+            block[:, ~active] = 0
+            block[rng.rand(n_images, 784) < 0.6] = 0
+            blocks[name + str(i)] = block
+    savemat(path, blocks)
+
+
+def measure(fn, *args):
+    tracemalloc.start()
+    start = time.perf_counter()
+    fn(*args)
+    elapsed = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return elapsed, peak
+
+
+if __name__ == "__main__":
+    mat_file = sys.argv[1] if len(sys.argv) > 1 else 'mnist_all.mat'
+    tmp_dir = None
+    if not os.path.exists(mat_file):
+        print("%s not found, using synthetic MNIST-shaped data" % mat_file)
+        tmp_dir = tempfile.mkdtemp()
+        mat_file = os.path.join(tmp_dir, 'mnist_all.mat')
+        writeSyntheticMat(mat_file)
+
+    try:
+        load_time, load_peak = measure(loadmat, mat_file)
+        loop_time, loop_peak = measure(preprocessLoop, mat_file)
+        vec_time, vec_peak = measure(_buildSplits, mat_file, False)
+        f32_time, f32_peak = measure(_buildSplits, mat_file, False, np.float32)
+    finally:
+        if tmp_dir is not None:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+
+    print("%-28s %10s %12s" % ("stage", "time (s)", "peak (MB)"))
+    print("%-28s %10.3f %12.1f" % ("loadmat only", load_time, load_peak / 1e6))
+    print("%-28s %10.3f %12.1f" % ("loop preprocess (float64)", loop_time, loop_peak / 1e6))
+    print("%-28s %10.3f %12.1f" % ("vectorized (float64)", vec_time, vec_peak / 1e6))
+    print("%-28s %10.3f %12.1f" % ("vectorized (float32)", f32_time, f32_peak / 1e6))
@@ -0,0 +1,74 @@
+"""
+Optimizer comparison for the logistic models
+
+Trains the one-vs-all (joint blrObjFunctionJoint) and multinomial Logistic
+Regression models with every solver of mlp3/solvers.py under its default
+options, and prints per solver the iterations, objective evaluations,
+Hessian-vector products, wall time, final accuracies, and the training time
+after which the validation accuracy first reached the one recorded in
+output.txt. Scoring the iterates is excluded from the times.
+
+Usage: python bench_solvers.py [mat_file] [solver ...]
+"""
+import sys
+import time
+
+import numpy as np
+
+from bench_float32 import baselineAccuracy
+from mlp3.data import MNIST_FILE, preprocess
+from mlp3.metrics import accuracy
+from mlp3.objectives import blrObjFunctionJoint, mlrObjFunction
+from mlp3.predict import blrPredict, mlrPredict
+from mlp3.solvers import SOLVERS, solve
+from mlp3.svm_sweep import formatTable
+
+MODELS = {'blr': (blrObjFunctionJoint, blrPredict), 'mlr': (mlrObjFunction, mlrPredict)}
+
+
+def runSolver(model, solver, train_data, Y, validation_data, validation_label, target):
+    """Returns the fitted W and the result row of one (model, solver) run"""
+    objective, predict = MODELS[model]
+    n_class = Y.shape[1]
+    shape = (train_data.shape[1] + 1, n_class)
+    start = time.perf_counter()
+    state = {'scoring': 0.0, 'reached': None}
+
+    def callback(x):
+        now = time.perf_counter()
+        if state['reached'] is None:
+            if accuracy(validation_label, predict(x.reshape(shape), validation_data)) >= target:
+                state['reached'] = now - start - state['scoring']
+        state['scoring'] += time.perf_counter() - now
+
+    result = solve(objective, np.zeros(shape[0] * n_class), (train_data, Y), solver=solver, callback=callback)
+    return result.x.reshape(shape), {'model': model, 'solver': solver, 'iterations': int(result.nit),
+                                     'evaluations': int(result.nfev), 'hessp': result.nhev,
+                                     'time': result.time - state['scoring'],
+                                     'time_to_target': state['reached'] if state['reached'] is not None else '-',
+                                     'converged': bool(result.success)}
+
+
+if __name__ == "__main__":
+    mat_file = sys.argv[1] if len(sys.argv) > 1 else MNIST_FILE
+    solvers = sys.argv[2:] or sorted(SOLVERS)
+
+    train_data, train_label, validation_data, validation_label, test_data, test_label = \
+        preprocess(design=True, mat_file=mat_file)
+    Y = (train_label == np.arange(10)).astype(np.float64)
+    target = baselineAccuracy()['Validation']
+
+    rows = []
+    for model in MODELS:
+        predict = MODELS[model][1]
+        for solver in solvers:
+            W, row = runSolver(model, solver, train_data, Y, validation_data, validation_label, target)
+            row.update(train_accuracy=accuracy(train_label, predict(W, train_data)),
+                       validation_accuracy=accuracy(validation_label, predict(W, validation_data)),
+                       test_accuracy=accuracy(test_label, predict(W, test_data)))
+            rows.append(row)
+            print("%s %s: %.1f s" % (model, solver, row['time']), file=sys.stderr)
+
+    print("target: validation accuracy %.2f%% (output.txt)" % target)
+    print(formatTable(rows, ['model', 'solver', 'iterations', 'evaluations', 'hessp', 'time', 'time_to_target',
+                             'train_accuracy', 'validation_accuracy', 'test_accuracy', 'converged']))
@@ -0,0 +1,83 @@
+"""
+Accuracy check of streaming training against full-batch training
+
+Writes synthetic MNIST-shaped training rows sorted by class, as preprocess()
+returns them, to shards with writeShards, trains every (model, optimizer)
+pair with trainStreaming, and compares the validation accuracy with the
+same model fitted full-batch by L-BFGS (see mlp3/solvers.py). A pair more
+than --max-gap points below its full-batch accuracy fails the check, and
+the script then exits with status 1.
+
+Usage: python bench_streaming.py [--n-train 20000] [--n-epochs 5]
+       [--noise 1.0] [--max-gap 2.0]
+"""
+import argparse
+import shutil
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+from bench_suite import N_CLASS, syntheticData
+from mlp3.metrics import accuracy
+from mlp3.objectives import blrObjFunctionJoint, mlrObjFunction
+from mlp3.predict import blrPredict, mlrPredict
+from mlp3.solvers import solve
+from mlp3.streaming import trainStreaming, writeShards
+
+MODELS = {'blr': (blrObjFunctionJoint, blrPredict), 'mlr': (mlrObjFunction, mlrPredict)}
+OPTIMIZERS = {'sgd': 0.1, 'momentum': 0.01, 'adam': 0.01}
+
+
+def main(argv):
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--n-train', type=int, default=20000)
+    parser.add_argument('--n-validation', type=int, default=5000)
+    parser.add_argument('--n-epochs', type=int, default=5)
+    # Noisy enough that batches drawn from one or two classes fall far
+    # short of the full-batch accuracy
+    parser.add_argument('--noise', type=float, default=1.0)
+    parser.add_argument('--max-gap', type=float, default=2.0,
+                        help="allowed accuracy points below full-batch training")
+    args = parser.parse_args(argv)
+
+    X, label = syntheticData(args.n_train + args.n_validation, noise=args.noise)
+    data, validation_data = X[:args.n_train, 1:], X[args.n_train:, 1:]
+    label, validation_label = label[:args.n_train], label[args.n_train:]
+    order = np.argsort(label.ravel(), kind='stable')
+    data, label = data[order], label[order]
+    Y = (label == np.arange(N_CLASS)).astype(np.float64)
+
+    shard_dir = tempfile.mkdtemp(prefix='bench-streaming-')
+    failures = []
+    try:
+        shards = writeShards(data, label, shard_dir, shard_size=5000)
+        print("%-6s %-10s %12s %10s %10s" % ("model", "optimizer", "validation %", "gap", "time (s)"))
+        for model, (objective, predict) in MODELS.items():
+            start = time.perf_counter()
+            result = solve(objective, np.zeros((data.shape[1] + 1) * N_CLASS), (data, Y), solver='lbfgs')
+            full = accuracy(validation_label, predict(result.x.reshape(-1, N_CLASS), validation_data))
+            print("%-6s %-10s %12.2f %10s %10.2f" % (model, 'full-batch', full, '-', time.perf_counter() - start))
+            for optimizer, learning_rate in OPTIMIZERS.items():
+                start = time.perf_counter()
+                W = trainStreaming(shards, N_CLASS, model=model, optimizer=optimizer, learning_rate=learning_rate,
+                                   n_epochs=args.n_epochs)
+                streamed = accuracy(validation_label, predict(W, validation_data))
+                gap = full - streamed
+                print("%-6s %-10s %12.2f %10.2f %10.2f" % (model, optimizer, streamed, gap,
+                                                           time.perf_counter() - start))
+                if gap > args.max_gap:
+                    failures.append('%s/%s' % (model, optimizer))
+    finally:
+        shutil.rmtree(shard_dir, ignore_errors=True)
+
+    if failures:
+        print("%d pair(s) more than %.1f points below full-batch: %s"
+              % (len(failures), args.max_gap, ', '.join(failures)))
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,215 @@
+"""
+Benchmark suite for the hot paths of mlp3, with regression checks
+
+Runs every path below on synthetic MNIST-shaped data (717 features, 10
+classes) at each size, so no mnist_all.mat or network access is needed:
+
+    preprocess       preprocess(design=True) on a synthetic .mat whose training
+                     split has the given number of rows
+    blrObjFunction   one evaluation on the bias-augmented design matrix
+    mlrObjFunction   one evaluation
+    blrPredict       scoring all rows with a (D + 1) x 10 W
+    mlrPredict       scoring all rows
+    svc_rbf_fit      SVC(kernel='rbf', gamma='auto').fit, up to SVC_MAX_ROWS
+    linear_svm_fit   trainLinearSVM (liblinear), up to LINEAR_SVM_MAX_ROWS
+
+Each (path, size) case runs in a fresh child process, so the peak RSS it
+reports is that case's alone. The best wall time over the repeats, the
+throughput in rows per second and the peak RSS are compared with the
+baseline file: a case fails when its time exceeds the baseline by more than
+--tolerance or its peak RSS by more than --memory-tolerance, and the suite
+then exits with status 1. The first run, or a run with --update, records
+the baseline instead. Baselines are machine-specific.
+
+Usage: python bench_suite.py [--sizes 1000 10000 50000 500000] [--paths ...]
+       [--baseline bench_baseline.json] [--tolerance 0.25]
+       [--memory-tolerance 0.1] [--repeats 3] [--update]
+"""
+import argparse
+import json
+import os
+import platform
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+SIZES = (1000, 10000, 50000, 500000)
+N_FEATURE = 717
+N_CLASS = 10
+SVC_MAX_ROWS = 10000
+LINEAR_SVM_MAX_ROWS = 50000
+BASELINE_FILE = 'bench_baseline.json'
+# Largest size each path runs at (None: every size)
+PATHS = {'preprocess': None, 'blrObjFunction': None, 'mlrObjFunction': None, 'blrPredict': None,
+         'mlrPredict': None, 'svc_rbf_fit': SVC_MAX_ROWS, 'linear_svm_fit': LINEAR_SVM_MAX_ROWS}
+
+
+def syntheticData(n_rows, seed=0, noise=0.2):
+    """
+     Returns (X, label): a bias-augmented N x (D + 1) design matrix of pixel
+     intensities in [0, 1], about 80% of them zero as in MNIST, drawn around
+     one random prototype per class with Gaussian noise of std noise, and
+     the N x 1 labels. Rows are filled in blocks so no full-size temporary
+     is made.
+    """
+    rng = np.random.RandomState(seed)
+    prototypes = rng.rand(N_CLASS, N_FEATURE) * (rng.rand(N_CLASS, N_FEATURE) < 0.3)
+    label = rng.randint(0, N_CLASS, n_rows)
+    X = np.empty((n_rows, N_FEATURE + 1))
+    X[:, 0] = 1
+    for start in range(0, n_rows, 10000):
+        stop = min(start + 10000, n_rows)
+        block = prototypes[label[start:stop]] + noise * rng.randn(stop - start, N_FEATURE)
+        np.clip(block, 0, 1, out=X[start:stop, 1:])
+    return X, label.reshape(-1, 1).astype(np.float64)
+
+
+def _bestTime(fn, repeats):
+    best = float('inf')
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def _maxRSSMB():
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss / (1024.0 * 1024.0) if sys.platform == 'darwin' else rss / 1024.0
+
+
+def runCase(path, n_rows, repeats, mat_file=None):
+    """Runs one case in this process; returns its seconds (best of repeats)"""
+    from mlp3.data import DesignMatrix, preprocess
+    from mlp3.objectives import blrObjFunction, mlrObjFunction
+    from mlp3.predict import blrPredict, mlrPredict
+
+    if path == 'preprocess':
+        return _bestTime(lambda: preprocess(design=True, mat_file=mat_file), repeats)
+
+    X, label = syntheticData(n_rows)
+    data = DesignMatrix(X, augmented=True)
+    rng = np.random.RandomState(1)
+    W = 0.01 * rng.randn(N_FEATURE + 1, N_CLASS)
+    if path == 'blrObjFunction':
+        labeli = (label == 0).astype(np.float64)
+        return _bestTime(lambda: blrObjFunction(W[:, 0], data, labeli), repeats)
+    if path == 'mlrObjFunction':
+        Y = (label == np.arange(N_CLASS)).astype(np.float64)
+        return _bestTime(lambda: mlrObjFunction(W.ravel(), data, Y, N_CLASS), repeats)
+    if path == 'blrPredict':
+        return _bestTime(lambda: blrPredict(W, data), repeats)
+    if path == 'mlrPredict':
+        return _bestTime(lambda: mlrPredict(W, data), repeats)
+    if path == 'svc_rbf_fit':
+        from sklearn.svm import SVC
+        return _bestTime(lambda: SVC(kernel='rbf', gamma='auto', C=1.0).fit(data.features, label.ravel()),
+                         repeats)
+    if path == 'linear_svm_fit':
+        from mlp3.svm_sweep import trainLinearSVM
+        return _bestTime(lambda: trainLinearSVM(data.features, label), repeats)
+    raise ValueError("unknown path %r" % (path,))
+
+
+def measureCase(path, n_rows, repeats, mat_file=None):
+    """Runs one case in a child process; returns {'time', 'throughput', 'peak_rss_mb'}"""
+    command = [sys.executable, os.path.abspath(__file__), '--case', path, str(n_rows), '--repeats', str(repeats)]
+    if mat_file is not None:
+        command += ['--mat-file', mat_file]
+    output = subprocess.run(command, check=True, stdout=subprocess.PIPE, universal_newlines=True,
+                            cwd=os.path.dirname(os.path.abspath(__file__))).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def compare(results, baseline, tolerance, memory_tolerance):
+    """Returns the text report and the list of regressed case keys"""
+    lines = ["%-28s %10s %10s %14s %10s %10s  %s" % ("case", "time (s)", "base (s)", "rows/s", "RSS (MB)",
+                                                    "base (MB)", "status")]
+    regressions = []
+    for key, result in results.items():
+        base = baseline.get(key)
+        status = 'new'
+        if base is not None:
+            slow = result['time'] > base['time'] * (1 + tolerance)
+            heavy = result['peak_rss_mb'] > base['peak_rss_mb'] * (1 + memory_tolerance)
+            status = ' '.join(word for word, bad in (('SLOWER', slow), ('MORE MEMORY', heavy)) if bad) or 'ok'
+            if slow or heavy:
+                regressions.append(key)
+        lines.append("%-28s %10.4f %10s %14.0f %10.1f %10s  %s" % (
+            key, result['time'], '%.4f' % base['time'] if base else '-', result['throughput'],
+            result['peak_rss_mb'], '%.1f' % base['peak_rss_mb'] if base else '-', status))
+    return '\n'.join(lines), regressions
+
+
+def main(argv):
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--sizes', type=int, nargs='+', default=list(SIZES))
+    parser.add_argument('--paths', nargs='+', default=list(PATHS), choices=list(PATHS))
+    parser.add_argument('--baseline', default=BASELINE_FILE)
+    parser.add_argument('--tolerance', type=float, default=0.25,
+                        help="allowed fractional increase of the time over the baseline")
+    parser.add_argument('--memory-tolerance', type=float, default=0.1,
+                        help="allowed fractional increase of the peak RSS over the baseline")
+    parser.add_argument('--repeats', type=int, default=3)
+    parser.add_argument('--update', action='store_true', help="record the results as the new baseline")
+    parser.add_argument('--case', nargs=2, metavar=('PATH', 'ROWS'), help=argparse.SUPPRESS)
+    parser.add_argument('--mat-file', help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.case is not None:
+        path, n_rows = args.case[0], int(args.case[1])
+        seconds = runCase(path, n_rows, args.repeats, args.mat_file)
+        print(json.dumps({'time': seconds, 'throughput': n_rows / seconds, 'peak_rss_mb': _maxRSSMB()}))
+        return 0
+
+    from bench_preprocess import writeSyntheticMat
+    from mlp3.data import N_VALIDATION
+
+    results = {}
+    tmp_dir = tempfile.mkdtemp(prefix='bench-suite-')
+    try:
+        for n_rows in args.sizes:
+            mat_file = None
+            if 'preprocess' in args.paths:
+                # n_rows training images after the validation rows are split off
+                mat_file = os.path.join(tmp_dir, 'mnist_%d.mat' % n_rows)
+                writeSyntheticMat(mat_file, n_train=n_rows // N_CLASS + N_VALIDATION,
+                                  n_test=max(n_rows // (6 * N_CLASS), 1))
+            for path in args.paths:
+                if PATHS[path] is not None and n_rows > PATHS[path]:
+                    continue
+                key = '%s/%d' % (path, n_rows)
+                results[key] = measureCase(path, n_rows, args.repeats, mat_file)
+                print("%-28s %10.4f s" % (key, results[key]['time']), file=sys.stderr)
+            if mat_file is not None:
+                os.remove(mat_file)
+    finally:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+
+    baseline = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            baseline = json.load(f)['cases']
+    report, regressions = compare(results, baseline, args.tolerance, args.memory_tolerance)
+    print(report)
+
+    if args.update or not baseline:
+        baseline.update(results)
+        with open(args.baseline, 'w') as f:
+            json.dump({'machine': platform.platform(), 'python': platform.python_version(),
+                       'numpy': np.__version__, 'cases': baseline}, f, indent=1, sort_keys=True)
+        print("baseline written to %s" % args.baseline)
+        return 0
+    if regressions:
+        print("%d regression(s): %s" % (len(regressions), ', '.join(regressions)))
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
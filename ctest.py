@@ -1,8 +1,6 @@
+import sys
+
 import numpy as np
-from scipy.io import loadmat
-from scipy.optimize import minimize
-from sklearn.svm import SVC
-np.set_printoptions(threshold=np.nan)
 
 
 
@@ -27,6 +25,8 @@ def preprocess():
        set
     """
 
+    from scipy.io import loadmat
+
     mat = loadmat('mnist_all.mat')  # loads the MAT object as a Dictionary
 
     n_feature = mat.get("train1").shape[1]
@@ -162,8 +162,10 @@ def mlrObjFunction(params, *args):
         error_grad: the vector of size (D+1) x 10 representing the gradient of
                     error function
     """
+    train_data, labeli = args
     n_data = train_data.shape[0]
     n_feature = train_data.shape[1]
+    n_class = labeli.shape[1]
     error = 0
     error_grad = np.zeros((n_feature + 1, n_class))
 
@@ -200,144 +202,150 @@ def mlrPredict(W, data):
     return label
 
 
-"""
-Script for Logistic Regression
-"""
-train_data, train_label, validation_data, validation_label, test_data, test_label = preprocess()
-
-# number of classes
-n_class = 10
-
-# number of training samples
-n_train = train_data.shape[0]
-
-# number of features
-n_feature = train_data.shape[1]
-
-Y = np.zeros((n_train, n_class))
-for i in range(n_class):
-    Y[:, i] = (train_label == i).astype(int).ravel()
-
-# Logistic Regression with Gradient Descent
-W = np.zeros((n_feature + 1, n_class))
-initialWeights = np.zeros((n_feature + 1, 1))
-opts = {'maxiter': 100}
-for i in range(n_class):
-    labeli = Y[:, i].reshape(n_train, 1)
-    args = (train_data, labeli)
-    nn_params = minimize(blrObjFunction, initialWeights, jac=True, args=args, method='CG', options=opts)
-    W[:, i] = nn_params.x.reshape((n_feature + 1,))
-
-# Find the accuracy on Training Dataset
-predicted_label = blrPredict(W, train_data)
-print('\n Training set Accuracy:' + str(100 * np.mean((predicted_label == train_label).astype(float))) + '%')
-
-# Find the accuracy on Validation Dataset
-predicted_label = blrPredict(W, validation_data)
-print('\n Validation set Accuracy:' + str(100 * np.mean((predicted_label == validation_label).astype(float))) + '%')
-
-# Find the accuracy on Testing Dataset
-predicted_label = blrPredict(W, test_data)
-print('\n Testing set Accuracy:' + str(100 * np.mean((predicted_label == test_label).astype(float))) + '%')
-
-"""
-Script for Support Vector Machine
-"""
-cvals = [1,10,20,30,40,50,60,70,80,90,100]
-for i in cvals:
-    
-    print('\n\n--------------SVM-------------------\n\n')
-    print("Radial Bias Segment Train C=",i)
-    X = train_data #reducing elements in here to run faster, CHANGE THIS
-    y = train_label#change this
-    y = np.ravel(y)
-    
-    clf = SVC(C=i, cache_size=200, class_weight=None, coef0=0.0,
-        decision_function_shape='ovr', degree=3, gamma='auto', kernel='rbf',
-        max_iter=-1, probability=False, random_state=None, shrinking=True,
-        tol=0.001, verbose=True)
-    clf.fit(X, y)
-    predictions=clf.predict(X)
-    Correct=0
-    Total=predictions.size
-    for i in range (0,predictions.size):
-        if(predictions[i] == y[i]):
-            Correct = Correct + 1
-    
-    Accuracy=(Correct/Total)*100
-    print("Accuracy: ",Accuracy,"%")
-    
-    
-    print("Radial Bias Segment Validation C=",i)
-    X = validation_data #reducing elements in here to run faster, CHANGE THIS
-    y = validation_label#change this
-    y = np.ravel(y)
-    
-    clf = SVC(C=i, cache_size=200, class_weight=None, coef0=0.0,
-        decision_function_shape='ovr', degree=3, gamma='auto', kernel='rbf',
-        max_iter=-1, probability=False, random_state=None, shrinking=True,
-        tol=0.001, verbose=False)
-    clf.fit(X, y)
-    #Currently Set to Linear Kernel (1st Problem)
-    #For 2nd problem, kernel='rbf' and gamma=1, possibly .1 according to piazza
-    #For 3rd problem, set gamma to 'auto'
-    #For 4th problem, set C=10,20,30...100 and record all values. Remove prints and run SVC 10x
-    predictions=clf.predict(X)
-    Correct=0
-    Total=predictions.size
-    for i in range (0,predictions.size):
-        if(predictions[i] == y[i]):
-            Correct = Correct + 1
-    
-    Accuracy=(Correct/Total)*100
-    print("Accuracy: ",Accuracy,"%")
-    
-    print("Radial Bias Segment Testing C=",i)
-    X = test_data #reducing elements in here to run faster, CHANGE THIS
-    y = test_label#change this
-    y = np.ravel(y)
-    
-    clf = SVC(C=i, cache_size=200, class_weight=None, coef0=0.0,
-        decision_function_shape='ovr', degree=3, gamma='auto', kernel='rbf',
-        max_iter=-1, probability=False, random_state=None, shrinking=True,
-        tol=0.001, verbose=False)
-    clf.fit(X, y)
-    #Currently Set to Linear Kernel (1st Problem)
-    #For 2nd problem, kernel='rbf' and gamma=1, possibly .1 according to piazza
-    #For 3rd problem, set gamma to 'auto'
-    #For 4th problem, set C=10,20,30...100 and record all values. Remove prints and run SVC 10x
-    predictions=clf.predict(X)
-    Correct=0
-    Total=predictions.size
-    for i in range (0,predictions.size):
-        if(predictions[i] == y[i]):
-            Correct = Correct + 1
-    
-    Accuracy=(Correct/Total)*100
-    print("Accuracy: ",Accuracy,"%")
-
-
-
-"""
-Script for Extra Credit Part
-"""
-# FOR EXTRA CREDIT ONLY
-W_b = np.zeros((n_feature + 1, n_class))
-initialWeights_b = np.zeros((n_feature + 1, n_class))
-opts_b = {'maxiter': 100}
-
-args_b = (train_data, Y)
-nn_params = minimize(mlrObjFunction, initialWeights_b, jac=True, args=args_b, method='CG', options=opts_b)
-W_b = nn_params.x.reshape((n_feature + 1, n_class))
-
-# Find the accuracy on Training Dataset
-predicted_label_b = mlrPredict(W_b, train_data)
-print('\n Training set Accuracy:' + str(100 * np.mean((predicted_label_b == train_label).astype(float))) + '%')
-
-# Find the accuracy on Validation Dataset
-predicted_label_b = mlrPredict(W_b, validation_data)
-print('\n Validation set Accuracy:' + str(100 * np.mean((predicted_label_b == validation_label).astype(float))) + '%')
-
-# Find the accuracy on Testing Dataset
-predicted_label_b = mlrPredict(W_b, test_data)
-print('\n Testing set Accuracy:' + str(100 * np.mean((predicted_label_b == test_label).astype(float))) + '%')
+if __name__ == "__main__":
+    from scipy.optimize import minimize
+    from sklearn.svm import SVC
+
+    np.set_printoptions(threshold=sys.maxsize)
+
+    """
+    Script for Logistic Regression
+    """
+    train_data, train_label, validation_data, validation_label, test_data, test_label = preprocess()
+
+    # number of classes
+    n_class = 10
+
+    # number of training samples
+    n_train = train_data.shape[0]
+
+    # number of features
+    n_feature = train_data.shape[1]
+
+    Y = np.zeros((n_train, n_class))
+    for i in range(n_class):
+        Y[:, i] = (train_label == i).astype(int).ravel()
+
+    # Logistic Regression with Gradient Descent
+    W = np.zeros((n_feature + 1, n_class))
+    initialWeights = np.zeros((n_feature + 1, 1))
+    opts = {'maxiter': 100}
+    for i in range(n_class):
+        labeli = Y[:, i].reshape(n_train, 1)
+        args = (train_data, labeli)
+        nn_params = minimize(blrObjFunction, initialWeights, jac=True, args=args, method='CG', options=opts)
+        W[:, i] = nn_params.x.reshape((n_feature + 1,))
+
+    # Find the accuracy on Training Dataset
+    predicted_label = blrPredict(W, train_data)
+    print('\n Training set Accuracy:' + str(100 * np.mean((predicted_label == train_label).astype(float))) + '%')
+
+    # Find the accuracy on Validation Dataset
+    predicted_label = blrPredict(W, validation_data)
+    print('\n Validation set Accuracy:' + str(100 * np.mean((predicted_label == validation_label).astype(float))) + '%')
+
+    # Find the accuracy on Testing Dataset
+    predicted_label = blrPredict(W, test_data)
+    print('\n Testing set Accuracy:' + str(100 * np.mean((predicted_label == test_label).astype(float))) + '%')
+
+    """
+    Script for Support Vector Machine
+    """
+    cvals = [1,10,20,30,40,50,60,70,80,90,100]
+    for i in cvals:
+
+        print('\n\n--------------SVM-------------------\n\n')
+        print("Radial Bias Segment Train C=",i)
+        X = train_data #reducing elements in here to run faster, CHANGE THIS
+        y = train_label#change this
+        y = np.ravel(y)
+
+        clf = SVC(C=i, cache_size=200, class_weight=None, coef0=0.0,
+            decision_function_shape='ovr', degree=3, gamma='auto', kernel='rbf',
+            max_iter=-1, probability=False, random_state=None, shrinking=True,
+            tol=0.001, verbose=True)
+        clf.fit(X, y)
+        predictions=clf.predict(X)
+        Correct=0
+        Total=predictions.size
+        for i in range (0,predictions.size):
+            if(predictions[i] == y[i]):
+                Correct = Correct + 1
+
+        Accuracy=(Correct/Total)*100
+        print("Accuracy: ",Accuracy,"%")
+
+
+        print("Radial Bias Segment Validation C=",i)
+        X = validation_data #reducing elements in here to run faster, CHANGE THIS
+        y = validation_label#change this
+        y = np.ravel(y)
+
+        clf = SVC(C=i, cache_size=200, class_weight=None, coef0=0.0,
+            decision_function_shape='ovr', degree=3, gamma='auto', kernel='rbf',
+            max_iter=-1, probability=False, random_state=None, shrinking=True,
+            tol=0.001, verbose=False)
+        clf.fit(X, y)
+        #Currently Set to Linear Kernel (1st Problem)
+        #For 2nd problem, kernel='rbf' and gamma=1, possibly .1 according to piazza
+        #For 3rd problem, set gamma to 'auto'
+        #For 4th problem, set C=10,20,30...100 and record all values. Remove prints and run SVC 10x
+        predictions=clf.predict(X)
+        Correct=0
+        Total=predictions.size
+        for i in range (0,predictions.size):
+            if(predictions[i] == y[i]):
+                Correct = Correct + 1
+
+        Accuracy=(Correct/Total)*100
+        print("Accuracy: ",Accuracy,"%")
+
+        print("Radial Bias Segment Testing C=",i)
+        X = test_data #reducing elements in here to run faster, CHANGE THIS
+        y = test_label#change this
+        y = np.ravel(y)
+
+        clf = SVC(C=i, cache_size=200, class_weight=None, coef0=0.0,
+            decision_function_shape='ovr', degree=3, gamma='auto', kernel='rbf',
+            max_iter=-1, probability=False, random_state=None, shrinking=True,
+            tol=0.001, verbose=False)
+        clf.fit(X, y)
+        #Currently Set to Linear Kernel (1st Problem)
+        #For 2nd problem, kernel='rbf' and gamma=1, possibly .1 according to piazza
+        #For 3rd problem, set gamma to 'auto'
+        #For 4th problem, set C=10,20,30...100 and record all values. Remove prints and run SVC 10x
+        predictions=clf.predict(X)
+        Correct=0
+        Total=predictions.size
+        for i in range (0,predictions.size):
+            if(predictions[i] == y[i]):
+                Correct = Correct + 1
+
+        Accuracy=(Correct/Total)*100
+        print("Accuracy: ",Accuracy,"%")
+
+
+
+    """
+    Script for Extra Credit Part
+    """
+    # FOR EXTRA CREDIT ONLY
+    W_b = np.zeros((n_feature + 1, n_class))
+    initialWeights_b = np.zeros((n_feature + 1, n_class))
+    opts_b = {'maxiter': 100}
+
+    args_b = (train_data, Y)
+    nn_params = minimize(mlrObjFunction, initialWeights_b, jac=True, args=args_b, method='CG', options=opts_b)
+    W_b = nn_params.x.reshape((n_feature + 1, n_class))
+
+    # Find the accuracy on Training Dataset
+    predicted_label_b = mlrPredict(W_b, train_data)
+    print('\n Training set Accuracy:' + str(100 * np.mean((predicted_label_b == train_label).astype(float))) + '%')
+
+    # Find the accuracy on Validation Dataset
+    predicted_label_b = mlrPredict(W_b, validation_data)
+    print('\n Validation set Accuracy:' + str(100 * np.mean((predicted_label_b == validation_label).astype(float))) + '%')
+
+    # Find the accuracy on Testing Dataset
+    predicted_label_b = mlrPredict(W_b, test_data)
+    print('\n Testing set Accuracy:' + str(100 * np.mean((predicted_label_b == test_label).astype(float))) + '%')
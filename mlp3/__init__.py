@@ -0,0 +1,36 @@
+"""
+MNIST classification with Logistic Regression and Support Vector Machines
+
+Modules:
+    data        preprocess(), DesignMatrix and the preprocess cache
+    objectives  blrObjFunction, blrObjFunctionJoint, mlrObjFunction
+    predict     blrPredict, mlrPredict
+    train       trainOneVsAll
+    svm_sweep   SVC sweeps, the warm-started C path and liblinear fits
+    metrics     accuracy and confusion matrices
+    cli         the experiment runner behind python -m mlp3
+
+plus kernel_approx, streaming, model_registry, inference_server, profiling
+and matrix_io. Importing the package or any of these modules runs nothing
+and loads scipy and sklearn only when a function needs them. The names
+below are importable from the package directly and load their module on
+first use.
+"""
+import importlib
+
+_EXPORTS = {
+    'preprocess': 'data', 'preprocessRows': 'data', 'DesignMatrix': 'data', 'designMatrix': 'data',
+    'sigmoid': 'objectives', 'blrObjFunction': 'objectives', 'blrObjFunctionJoint': 'objectives',
+    'mlrObjFunction': 'objectives',
+    'blrPredict': 'predict', 'mlrPredict': 'predict',
+    'trainOneVsAll': 'train',
+    'accuracy': 'metrics', 'ConfusionMatrix': 'metrics',
+}
+
+__all__ = sorted(_EXPORTS)
+
+
+def __getattr__(name):
+    if name not in _EXPORTS:
+        raise AttributeError("module %r has no attribute %r" % (__name__, name))
+    return getattr(importlib.import_module('.' + _EXPORTS[name], __name__), name)
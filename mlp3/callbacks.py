@@ -0,0 +1,218 @@
+"""
+Training callbacks for the logistic models: early stopping on validation
+loss and resumable checkpoints
+
+An EarlyStopping instance is passed to minimize as its callback (see
+train._minimize). Every `every` iterations it scores the weights on the
+validation split and writes a checkpoint; once the validation loss has gone
+`patience` evaluations without improving, it raises StopIteration, which
+ends the minimize run, and the best weights seen are returned.
+
+A checkpoint is one .npz file holding the current weights, the best
+weights and the state of the stopper, replaced atomically. A run started on
+an existing checkpoint continues from its weights with the iterations left
+of the budget, or, if the checkpoint is final, returns its weights without
+training. The optimizer's own state (search direction, curvature pairs,
+trust radius) is not saved, so it restarts from the checkpointed weights.
+The absolute gradient tolerance the run started with is saved, so that the
+resumed run stops where the uninterrupted one would instead of taking
+'rtol' relative to the smaller gradient at the checkpointed weights.
+"""
+import json
+import os
+import tempfile
+
+import numpy as np
+
+from .data import designMatrix
+from .predict import blrPredict, mlrPredict
+
+
+def blrValidation(data, labeli):
+    """
+     Returns evaluate(w) -> (validation loss, accuracy %) of one 2-class
+     Logistic Regression classifier, the loss being blrObjFunction's error
+     and labeli the N x 1 0/1 labels of data
+    """
+    X = designMatrix(data)
+    y = np.ravel(labeli).astype(X.dtype)
+
+    def evaluate(w):
+        z = X.dot(np.ravel(w).astype(X.dtype, copy=False))
+        loss = np.sum(np.logaddexp(0, z) - y * z, dtype=np.float64) / y.size
+        return float(loss), 100 * float(np.mean((z > 0) == (y > 0)))
+    return evaluate
+
+
+def blrValidationJoint(data, label):
+    """
+     Returns evaluate(params) -> (validation loss, accuracy %) of the joint
+     one-vs-all weights of blrObjFunctionJoint, label being the N x 1 class
+     of each row of data
+    """
+    X = designMatrix(data)
+    label = np.ravel(label)
+
+    def evaluate(params):
+        W = np.reshape(params, (X.shape[1], -1))
+        z = X.dot(W.astype(X.dtype, copy=False))
+        Y = (label[:, None] == np.arange(W.shape[1])).astype(X.dtype)
+        loss = np.sum(np.logaddexp(0, z) - Y * z, dtype=np.float64) / label.size
+        return float(loss), 100 * float(np.mean(np.ravel(blrPredict(W, data)) == label))
+    return evaluate
+
+
+def mlrValidation(data, label):
+    """
+     Returns evaluate(params) -> (validation loss, accuracy %) of the
+     multinomial weights, the loss being mlrObjFunction's cross-entropy
+     averaged over the rows and label the N x 1 class of each row of data
+    """
+    X = designMatrix(data)
+    label = np.ravel(label).astype(int)
+
+    def evaluate(params):
+        W = np.reshape(params, (X.shape[1], -1))
+        z = X.dot(W.astype(X.dtype, copy=False))
+        z -= z.max(axis=1, keepdims=True)
+        log_theta = z - np.log(np.exp(z).sum(axis=1, keepdims=True))
+        loss = -np.sum(log_theta[np.arange(label.size), label], dtype=np.float64) / label.size
+        return float(loss), 100 * float(np.mean(np.ravel(mlrPredict(W, data)) == label))
+    return evaluate
+
+
+class EarlyStopping(object):
+    """
+     EarlyStopping is a minimize callback that evaluates the weights every
+     `every` iterations and stops on a validation-loss plateau.
+
+     Input:
+         evaluate: a function of the weights returning (validation loss,
+         accuracy), such as blrValidation(...); None only checkpoints
+         every: iterations between evaluations and checkpoints
+         patience: evaluations without improvement after which to stop
+         min_delta: the relative decrease of the loss counted as improvement
+         checkpoint: path of the .npz checkpoint, or None
+
+     After the run, history lists {'iteration', 'loss', 'accuracy'} per
+     evaluation and stopped_at is the iteration it stopped at (None if the
+     solver ended the run). gtol, the absolute gradient tolerance of the
+     run, is set by the caller and kept in the checkpoint.
+    """
+
+    def __init__(self, evaluate=None, every=5, patience=3, min_delta=1e-4, checkpoint=None):
+        if every < 1 or patience < 1:
+            raise ValueError("every and patience must be at least 1")
+        self.evaluate = evaluate
+        self.every = every
+        self.patience = patience
+        self.min_delta = min_delta
+        self.checkpoint = checkpoint
+        self.iteration = 0
+        self.history = []
+        self.best = None
+        self.best_loss = np.inf
+        self.wait = 0
+        self.stopped_at = None
+        self.resumed_from = None
+        self.done = False
+        self.fun = None
+        self.gtol = None
+
+    def start(self, initialWeights, opts):
+        """
+         Loads the checkpoint, if there is one, and returns the weights and
+         options to start minimize with: the checkpointed weights, the
+         iterations left of opts['maxiter'] and the saved 'gtol' in place of
+         'rtol'
+        """
+        opts = dict(opts)
+        if self.checkpoint is None or not os.path.exists(self.checkpoint):
+            return initialWeights, opts
+        with np.load(self.checkpoint) as saved:
+            x, best, state = saved['x'], saved['best'], json.loads(str(saved['state']))
+        if x.shape != np.shape(initialWeights):
+            raise ValueError("checkpoint %s holds weights of shape %s, expected %s"
+                             % (self.checkpoint, x.shape, np.shape(initialWeights)))
+        self.iteration = self.resumed_from = state['iteration']
+        self.history = state['history']
+        self.best_loss = state['best_loss'] if state['best_loss'] is not None else np.inf
+        self.best = best if best.size else None
+        self.wait = state['wait']
+        self.stopped_at = state['stopped_at']
+        self.fun = state['fun']
+        self.done = state['done'] or self.stopped_at is not None
+        if state.get('gtol') is not None:
+            opts.pop('rtol', None)
+            opts['gtol'] = self.gtol = state['gtol']
+        if 'maxiter' in opts:
+            opts['maxiter'] = max(opts['maxiter'] - self.iteration, 0)
+            self.done = self.done or opts['maxiter'] == 0
+        return x, opts
+
+    def __call__(self, x):
+        self.iteration += 1
+        if self.iteration % self.every:
+            return
+        if self.evaluate is not None:
+            loss, accuracy = self.evaluate(x)
+            self.history.append({'iteration': self.iteration, 'loss': loss, 'accuracy': accuracy})
+            if self.best is None or loss < self.best_loss - self.min_delta * max(abs(self.best_loss), 1.0):
+                self.best_loss = loss
+                self.best = np.array(x, copy=True)
+                self.wait = 0
+            else:
+                self.wait += 1
+        stop = self.evaluate is not None and self.wait >= self.patience
+        if stop:
+            self.stopped_at = self.iteration
+        self._save(x)
+        if stop:
+            raise StopIteration
+
+    def finish(self, result, objective=None, args=()):
+        """
+         Replaces result.x by the best weights if the run was stopped early,
+         and result.fun by objective(best, *args)'s error so both describe
+         the same weights, adds 'stopped_at' and 'resumed_from' to result and
+         writes the final checkpoint
+        """
+        if self.stopped_at is not None and self.best is not None:
+            result.x = self.best
+            if objective is not None:
+                result.fun = float(objective(self.best, *args)[0])
+                result.nfev = int(result.nfev) + 1
+        result.stopped_at = self.stopped_at
+        result.resumed_from = self.resumed_from
+        self.fun = float(result.fun)
+        self.done = True
+        self._save(result.x)
+        return result
+
+    def result(self, x):
+        """The result of a run whose checkpoint was already final"""
+        from scipy.optimize import OptimizeResult
+
+        if self.stopped_at is not None and self.best is not None:
+            x = self.best
+        return OptimizeResult(x=x, fun=self.fun if self.fun is not None else np.nan, nit=self.iteration, nfev=0,
+                              nhev=0, success=True, message="restored from checkpoint", time=0.0,
+                              stopped_at=self.stopped_at, resumed_from=self.resumed_from)
+
+    def _save(self, x):
+        if self.checkpoint is None:
+            return
+        state = {'iteration': self.iteration, 'history': self.history,
+                 'best_loss': self.best_loss if np.isfinite(self.best_loss) else None, 'wait': self.wait,
+                 'stopped_at': self.stopped_at, 'fun': self.fun, 'done': self.done, 'gtol': self.gtol}
+        directory = os.path.dirname(os.path.abspath(self.checkpoint))
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(prefix='.checkpoint-', dir=directory)
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                np.savez(f, x=x, best=self.best if self.best is not None else np.empty(0),
+                         state=np.array(json.dumps(state)))
+            os.replace(tmp_path, self.checkpoint)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
@@ -0,0 +1,299 @@
+"""
+Command-line entry point for the experiments of the assignment
+
+    python -m mlp3 [blr] [svm] [mlr] [options]
+
+runs the chosen experiments (all three when none is named) on a single
+preprocessing of the data, in the order one-vs-all Logistic Regression,
+Support Vector Machines, multinomial Logistic Regression, and prints the same
+report as the original script. The flags that used to be edited in the
+script body are options; see --help.
+"""
+import argparse
+import os
+import shutil
+import time
+
+import numpy as np
+
+from . import profiling
+
+EXPERIMENTS = ('blr', 'svm', 'mlr')
+
+
+def parseArgs(argv=None):
+    from .data import MNIST_FILE
+    from .solvers import SOLVERS
+
+    parser = argparse.ArgumentParser(prog='python -m mlp3', description="Run the MNIST experiments.")
+    parser.add_argument('experiments', nargs='*', metavar='experiment',
+                        help="blr, svm and/or mlr (default: all)")
+    parser.add_argument('--mat-file', default=MNIST_FILE)
+    parser.add_argument('--cache-dir', default='.preprocess_cache',
+                        help="preprocess cache directory ('' disables the cache)")
+    # float32 halves the memory traffic of training and prediction; sparse
+    # stores only the non-zero pixels, for the logistic models and SVC
+    parser.add_argument('--dtype', choices=('float64', 'float32'), default='float64')
+    parser.add_argument('--sparse', action='store_true')
+    parser.add_argument('--models-dir', default='models',
+                        help="registry directory the trained weights are saved to")
+    parser.add_argument('--trace', default='trace.json',
+                        help="stage timings (.json or .csv; '' disables tracing)")
+    parser.add_argument('--profile', default=None, help="also dump cProfile stats to this path")
+    # The classes are independent, so train them on a pool of workers, or
+    # fit all of them in one pass over the data per step with --joint-ovr
+    parser.add_argument('--n-jobs', type=int, default=None,
+                        help="one-vs-all classes trained concurrently (default: one per CPU)")
+    parser.add_argument('--joint-ovr', action='store_true')
+    # cg runs the original fixed budget; the other solvers (see solvers.py)
+    # stop on convergence, with --maxiter as a safety cap
+    parser.add_argument('--solver', choices=sorted(SOLVERS),
+                        default='cg', help="optimizer of the logistic models")
+    parser.add_argument('--maxiter', type=int, default=None,
+                        help="iteration cap of the logistic models (default: the solver's)")
+    # Score the logistic models on the validation split every --eval-every
+    # iterations and stop once the loss has not improved for --patience
+    # scores; with --checkpoint-dir, a killed run resumes where it left
+    parser.add_argument('--early-stopping', action='store_true')
+    parser.add_argument('--eval-every', type=int, default=5)
+    parser.add_argument('--patience', type=int, default=3)
+    parser.add_argument('--checkpoint-dir', default=None,
+                        help="checkpoint the logistic models' weights here while they train")
+    parser.add_argument('--svm-c-path', action='store_true',
+                        help="also fit the default-gamma C values as one warm-started regularization path "
+                             "with the reference SMO solver, next to the independent fits (slower than "
+                             "SVC; needs the kernel block of each class pair to fit the cache)")
+    parser.add_argument('--svm-parallel', action='store_true',
+                        help="run the SVC fits on a process pool, recording each result in "
+                             "--svm-results so an interrupted run resumes where it left")
+    parser.add_argument('--svm-results', default='svm_results.jsonl',
+                        help="results file of --svm-parallel; results are only reused for the same data")
+    parser.add_argument('--svm-svc-linear', action='store_true',
+                        help="train the linear kernel with SVC instead of liblinear's coordinate descent "
+                             "(see bench_linear_svm.py for their accuracy and time)")
+    parser.add_argument('--svm-rbf-approx', choices=('rff', 'nystroem'), default=None,
+                        help="replace every exact RBF fit by a linear SVM on approximate RBF features")
+    parser.add_argument('--svm-approx-components', type=int, default=2000)
+    args = parser.parse_args(argv)
+    unknown = [name for name in args.experiments if name not in EXPERIMENTS]
+    if unknown:
+        parser.error("unknown experiment %s; choose from %s" % (', '.join(unknown), ', '.join(EXPERIMENTS)))
+    args.experiments = [name for name in EXPERIMENTS if name in args.experiments] or list(EXPERIMENTS)
+    return args
+
+
+def _maxiterOption(args):
+    return {} if args.maxiter is None else {'maxiter': args.maxiter}
+
+
+def _earlyStopping(args):
+    return {'every': args.eval_every, 'patience': args.patience} if args.early_stopping else None
+
+
+def _checkpointDir(args, model):
+    return os.path.join(args.checkpoint_dir, model) if args.checkpoint_dir else None
+
+
+def loadData(args):
+    """
+     loadData preprocesses the data once for every experiment.
+
+     Output:
+         context: dict with the DesignMatrix splits and labels of
+         preprocess(), the feature 'index', the one-hot training labels 'Y',
+         'n_class' and the model 'registry'
+    """
+    from .data import preprocess
+    from .model_registry import ModelRegistry
+
+    train_data, train_label, validation_data, validation_label, test_data, test_label, index = \
+        preprocess(design=True, cache_dir=args.cache_dir or None, return_index=True, mat_file=args.mat_file,
+                   dtype=np.dtype(args.dtype).type, sparse=args.sparse)
+
+    # number of classes
+    n_class = 10
+
+    Y = np.zeros((train_data.shape[0], n_class))
+    for i in range(n_class):
+        Y[:, i] = (train_label == i).astype(int).ravel()
+
+    # Trained weights are saved as memory-mappable artifacts tagged with the
+    # feature-selection index (see model_registry.py)
+    return {'train_data': train_data, 'train_label': train_label, 'validation_data': validation_data,
+            'validation_label': validation_label, 'test_data': test_data, 'test_label': test_label,
+            'index': index, 'Y': Y, 'n_class': n_class, 'registry': ModelRegistry(args.models_dir)}
+
+
+def runBlr(context, args):
+    """Logistic Regression with Gradient Descent"""
+    from .metrics import ConfusionMatrix, accuracy
+    from .predict import blrPredict
+    from .solvers import solverOptions
+    from .train import trainOneVsAll
+
+    train_data, train_label = context['train_data'], context['train_label']
+    validation_data, validation_label = context['validation_data'], context['validation_label']
+    test_data, test_label = context['test_data'], context['test_label']
+    n_class = context['n_class']
+
+    print("Logistic Regression with Gradient Descent")
+    start_time = time.time()
+    opts = solverOptions(args.solver, _maxiterOption(args))
+    n_jobs = args.n_jobs or min(n_class, os.cpu_count() or 1)
+    W = trainOneVsAll(train_data, context['Y'], opts=opts, n_jobs=n_jobs, executor='process',
+                      joint=args.joint_ovr, solver=args.solver, validation=(validation_data, validation_label),
+                      early_stopping=_earlyStopping(args), checkpoint_dir=_checkpointDir(args, 'blr'))
+
+    context['registry'].register('blr', W, 'blr', context['index'],
+                                 metadata={'solver': args.solver, 'opts': opts, 'joint': args.joint_ovr,
+                                           'n_train': train_data.shape[0], 'dtype': args.dtype,
+                                           'early_stopping': _earlyStopping(args)})
+    if args.checkpoint_dir:
+        shutil.rmtree(_checkpointDir(args, 'blr'), ignore_errors=True)
+
+    # Find the accuracy on Training Dataset
+    predicted_label = blrPredict(W, train_data)
+    print('\n Training set Accuracy:' + str(accuracy(train_label, predicted_label)) + '%')
+
+    # Find the accuracy on Validation Dataset
+    predicted_label = blrPredict(W, validation_data)
+    print('\n Validation set Accuracy:' + str(accuracy(validation_label, predicted_label)) + '%')
+
+    # Find the accuracy on Testing Dataset
+    predicted_label = blrPredict(W, test_data)
+    print('\n Testing set Accuracy:' + str(accuracy(test_label, predicted_label)) + '%')
+    test_confusion = ConfusionMatrix(n_class).update(test_label, predicted_label)
+    print('\n Testing set per-class error (%):' + str(np.round(test_confusion.perClassError(), 2)))
+    print('\n Blr time:' + str(time.time() - start_time))
+
+
+def runSvm(context, args):
+    """
+    Linear kernel, RBF with gamma=0.1, then RBF with the default gamma for
+    every C (C=1 being the default-gamma segment). All C values of one gamma
+    share a single cached kernel matrix, and every configuration is fitted
+    once on the training split and scores all three splits.
+    """
+    from .kernel_approx import approxRBFResults
+    from .svm_sweep import KernelCache, cPathSVC, formatTable, linearSVMResults, runSweep, sweepSVC
+
+    print('\n\n--------------SVM-------------------\n\n')
+    cvals = [1, 10, 20, 30, 40, 50, 60, 70, 80, 90, 100]
+    svm_configs = [{'kernel': 'rbf', 'gamma': 0.1, 'C': 1.0}]
+    if args.svm_svc_linear:
+        svm_configs.insert(0, {'kernel': 'linear', 'C': 1.0})
+    path_configs = [{'kernel': 'rbf', 'gamma': 'auto', 'C': cvalue} for cvalue in cvals]
+    kernel_cache = KernelCache(budget_mb=2048)
+    svm_sets = [('train', context['train_data'].features, context['train_label']),
+                ('validation', context['validation_data'].features, context['validation_label']),
+                ('test', context['test_data'].features, context['test_label'])]
+    X, y = context['train_data'].features, context['train_label']
+    use_path = args.svm_c_path and args.svm_rbf_approx is None
+    if args.svm_c_path and not use_path:
+        print("Warning: --svm-c-path skipped, the exact RBF fits are replaced by --svm-rbf-approx")
+    configs = svm_configs + path_configs
+    approx_configs = []
+    if args.svm_rbf_approx is not None:
+        approx_configs = [{'method': args.svm_rbf_approx, 'gamma': config['gamma'], 'C': config['C'],
+                           'n_components': args.svm_approx_components}
+                          for config in configs if config['kernel'] == 'rbf']
+        configs = [config for config in configs if config['kernel'] != 'rbf']
+    if args.svm_parallel:
+        results = runSweep(X, y, configs, args.svm_results, eval_sets=svm_sets)
+    else:
+        results = sweepSVC(X, y, configs, eval_sets=svm_sets, cache=kernel_cache)
+    if approx_configs:
+        results += approxRBFResults(X, y, approx_configs, eval_sets=svm_sets)
+    if not args.svm_svc_linear:
+        linear_result = linearSVMResults(X, y, C=1.0, eval_sets=svm_sets)
+        W_svm = linear_result.pop('W')
+        context['registry'].register('linear-svm', W_svm, 'linear-svm', context['index'],
+                                     metadata={'C': linear_result['C'], 'n_train': X.shape[0]})
+        results.insert(0, linear_result)
+    print(formatTable(results, ['kernel', 'gamma', 'C', 'train_accuracy', 'validation_accuracy',
+                                'test_accuracy', 'fit_time', 'predict_time']))
+    if use_path:
+        print("\nkernel=rbf gamma=auto C path:")
+        try:
+            path = cPathSVC(X, y, cvals, gamma='auto', eval_sets=svm_sets, cache=kernel_cache)
+        except ValueError as e:
+            print("Warning: --svm-c-path skipped, %s" % e)
+        else:
+            # Set the independent fits of the same C values beside the path
+            independent = dict((result['C'], result) for result in results
+                               if result['kernel'] == 'rbf' and result.get('gamma') == 'auto')
+            for row in path:
+                fit = independent[row['C']]
+                row['independent_fit_time'] = fit['fit_time']
+                for set_name, set_data, set_label in svm_sets:
+                    row[set_name + '_independent_accuracy'] = fit[set_name + '_accuracy']
+            print(formatTable(path, ['C', 'train_accuracy', 'validation_accuracy', 'test_accuracy',
+                                     'validation_independent_accuracy', 'fit_time', 'independent_fit_time',
+                                     'iterations']))
+    print(kernel_cache.report())
+
+
+def runMlr(context, args):
+    """Extra credit: multinomial Logistic Regression"""
+    from .metrics import accuracy
+    from .objectives import mlrObjFunction
+    from .predict import mlrPredict
+    from .solvers import solverOptions
+    from .callbacks import mlrValidation
+    from .train import _minimize, _stopper
+
+    train_data, train_label = context['train_data'], context['train_label']
+    n_class = context['n_class']
+    n_feature = train_data.shape[1]
+
+    print("Extra Credit")
+    initialWeights_b = np.zeros((n_feature + 1, n_class))
+    opts_b = solverOptions(args.solver, _maxiterOption(args))
+
+    start_time = time.time()
+
+    args_b = (train_data, context['Y'], n_class)
+    checkpoint = os.path.join(_checkpointDir(args, 'mlr'), 'mlr.npz') if args.checkpoint_dir else None
+    stopper = _stopper(mlrValidation(context['validation_data'], context['validation_label']),
+                       _earlyStopping(args), checkpoint)
+    nn_params = _minimize('mlrObjFunction', mlrObjFunction, initialWeights_b.ravel(), args_b, opts_b,
+                          args.solver, stopper)
+    W_b = nn_params.x.reshape((n_feature + 1, n_class))
+    context['registry'].register('mlr', W_b, 'mlr', context['index'],
+                                 metadata={'solver': args.solver, 'opts': opts_b, 'n_train': train_data.shape[0],
+                                           'dtype': args.dtype, 'early_stopping': _earlyStopping(args)})
+    if args.checkpoint_dir:
+        shutil.rmtree(_checkpointDir(args, 'mlr'), ignore_errors=True)
+
+    # Find the accuracy on Training Dataset
+    predicted_label_b = mlrPredict(W_b, train_data)
+    print('\n Training set Accuracy:' + str(accuracy(train_label, predicted_label_b)) + '%')
+
+    # Find the accuracy on Validation Dataset
+    predicted_label_b = mlrPredict(W_b, context['validation_data'])
+    print('\n Validation set Accuracy:' + str(accuracy(context['validation_label'], predicted_label_b)) + '%')
+
+    # Find the accuracy on Testing Dataset
+    predicted_label_b = mlrPredict(W_b, context['test_data'])
+    print('\n Testing set Accuracy:' + str(accuracy(context['test_label'], predicted_label_b)) + '%')
+    print('\n Mlr time:' + str(time.time() - start_time))
+
+
+RUNNERS = {'blr': runBlr, 'svm': runSvm, 'mlr': runMlr}
+
+
+def main(argv=None):
+    args = parseArgs(argv)
+    if args.trace or args.profile:
+        profiling.enable(cprofile=args.profile is not None)
+
+    context = loadData(args)
+    for name in args.experiments:
+        RUNNERS[name](context, args)
+
+    if args.trace:
+        profiling.writeTrace(args.trace)
+        print('\n' + profiling.summary())
+    if args.profile:
+        profiling.dumpCProfile(args.profile)
+    return 0
@@ -0,0 +1,278 @@
+"""
+Loading and preprocessing of the MNIST data
+
+preprocess() builds the train/validation/test splits from mnist_all.mat,
+optionally caching them as memory-mappable .npy files, and DesignMatrix holds
+the bias-augmented matrix the objectives and predict functions share.
+scipy is imported only when a .mat file is read or sparse data is requested.
+"""
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+
+import numpy as np
+
+from . import profiling
+from .matrix_io import isSparse, loadMatrix, saveMatrix, umaskedMode
+
+# Preprocessing parameters; any change to them or to the code below that
+# alters the splits must be reflected here so cached splits are rebuilt
+MNIST_FILE = 'mnist_all.mat'
+# Pixels of a 28 x 28 MNIST image
+N_PIXELS = 784
+N_VALIDATION = 1000
+STD_THRESHOLD = 0.001
+PREPROCESS_VERSION = 1
+
+_SPLIT_NAMES = ('train_data', 'train_label', 'validation_data', 'validation_label',
+                'test_data', 'test_label', 'index')
+
+
+def preprocess(design=False, cache_dir=None, return_index=False, mat_file=MNIST_FILE, dtype=np.float64,
+               sparse=False):
+    """ 
+     Input:
+     Although this function doesn't have any input, you are required to load
+     the MNIST data set from file 'mnist_all.mat'.
+     design: if True, return train_data, validation_data and test_data as
+       DesignMatrix objects with the bias column already present
+     cache_dir: if given, the final splits are stored there as .npy files
+       keyed by a hash of mat_file's content and the preprocessing
+       parameters, and later calls memory-map them instead of rebuilding
+     return_index: if True, also return the indices of the selected features
+     mat_file: path of the MNIST .mat file
+     dtype: floating type of the data matrices; np.float32 halves their
+       memory and the traffic of every objective and predict call
+     sparse: if True, the data matrices are scipy.sparse CSR matrices, which
+       store only the non-zero pixels
+
+     Output:
+     train_data: matrix of training set. Each row of train_data contains 
+       feature vector of a image
+     train_label: vector of label corresponding to each image in the training
+       set
+     validation_data: matrix of training set. Each row of validation_data 
+       contains feature vector of a image
+     validation_label: vector of label corresponding to each image in the 
+       training set
+     test_data: matrix of training set. Each row of test_data contains 
+       feature vector of a image
+     test_label: vector of label corresponding to each image in the testing
+       set
+     index: (only if return_index) vector of the columns of the original 784
+       pixels kept in the data matrices
+    """
+    with profiling.span('preprocess', cached=cache_dir is not None, dtype=np.dtype(dtype).name,
+                        sparse=sparse):
+        if cache_dir is None:
+            splits = _buildSplits(mat_file, design, dtype, sparse)
+        else:
+            splits = _cachedSplits(mat_file, design, cache_dir, dtype, sparse)
+
+    train_data, train_label, validation_data, validation_label, test_data, test_label, index = splits
+    if design:
+        train_data = DesignMatrix(train_data, augmented=True)
+        validation_data = DesignMatrix(validation_data, augmented=True)
+        test_data = DesignMatrix(test_data, augmented=True)
+
+    if return_index:
+        return train_data, train_label, validation_data, validation_label, test_data, test_label, index
+    return train_data, train_label, validation_data, validation_label, test_data, test_label
+
+
+def _cacheKey(mat_file, design, dtype, sparse):
+    digest = hashlib.sha256()
+    with open(mat_file, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    params = {'version': PREPROCESS_VERSION, 'n_validation': N_VALIDATION,
+              'std_threshold': STD_THRESHOLD, 'design': bool(design),
+              'dtype': np.dtype(dtype).name, 'sparse': bool(sparse)}
+    digest.update(json.dumps(params, sort_keys=True).encode())
+    return digest.hexdigest()[:32]
+
+
+def _cachedSplits(mat_file, design, cache_dir, dtype, sparse):
+    """
+    Loads the splits of mat_file from cache_dir with mmap_mode='r', building
+    and storing them first if this (file content, parameters) pair has not
+    been cached yet.
+    """
+    with profiling.span('preprocess.cache_key'):
+        entry = os.path.join(cache_dir, 'mnist-' + _cacheKey(mat_file, design, dtype, sparse))
+    if not os.path.isdir(entry):
+        splits = _buildSplits(mat_file, design, dtype, sparse)
+        os.makedirs(cache_dir, exist_ok=True)
+        # Write to a private directory and rename it into place, so a
+        # concurrent or interrupted run never sees a partial entry
+        with profiling.span('preprocess.cache_write'):
+            partial = tempfile.mkdtemp(prefix='partial-', dir=cache_dir)
+            os.chmod(partial, umaskedMode(0o777))
+            for name, array in zip(_SPLIT_NAMES, splits):
+                saveMatrix(os.path.join(partial, name), array)
+            try:
+                os.rename(partial, entry)
+            except OSError:
+                shutil.rmtree(partial, ignore_errors=True)
+                if not os.path.isdir(entry):
+                    raise
+    with profiling.span('preprocess.cache_load'):
+        return tuple(loadMatrix(os.path.join(entry, name)) for name in _SPLIT_NAMES)
+
+
+def _buildSplits(mat_file, design, dtype=np.float64, sparse=False):
+    """
+    Builds the splits of preprocess() from mat_file. With design, the data
+    matrices are returned already bias-augmented (N x (D + 1)); with sparse,
+    they are CSR matrices.
+    """
+    from scipy.io import loadmat
+
+    with profiling.span('preprocess.loadmat'):
+        mat = loadmat(mat_file)  # loads the MAT object as a Dictionary
+    train_blocks = [mat['train' + str(i)] for i in range(10)]
+    test_blocks = [mat['test' + str(i)] for i in range(10)]
+    n_validation = N_VALIDATION
+
+    # The first n_validation images of each digit form the validation set and
+    # the rest the training set. Each split is one concatenation of the raw
+    # uint8 blocks, converted to dtype only after feature selection.
+    with profiling.span('preprocess.split'):
+        validation_raw = np.concatenate([block[:n_validation] for block in train_blocks])
+        train_raw = np.concatenate([block[n_validation:] for block in train_blocks])
+        test_raw = np.concatenate(test_blocks)
+
+        digits = np.arange(10, dtype=np.float64)
+        validation_label = np.repeat(digits, n_validation).reshape(-1, 1)
+        train_label = np.repeat(digits, [block.shape[0] - n_validation for block in train_blocks]).reshape(-1, 1)
+        test_label = np.repeat(digits, [block.shape[0] for block in test_blocks]).reshape(-1, 1)
+    del mat, train_blocks, test_blocks
+
+    # Delete features which don't provide any useful information for classifiers
+    with profiling.span('preprocess.feature_select') as attrs:
+        index = np.flatnonzero(_featureStd(train_raw) > STD_THRESHOLD)
+        attrs['n_feature'] = int(index.size)
+
+    # Scale data to 0 and 1
+    with profiling.span('preprocess.scale'):
+        train_data = _selectAndScale(train_raw, index, design, dtype, sparse)
+        validation_data = _selectAndScale(validation_raw, index, design, dtype, sparse)
+        test_data = _selectAndScale(test_raw, index, design, dtype, sparse)
+
+    return train_data, train_label, validation_data, validation_label, test_data, test_label, index
+
+
+def _featureStd(raw, block_columns=64):
+    """
+    Per-column standard deviation of the uint8 matrix raw, computed in
+    float64 a few columns at a time so no full float copy is made.
+    """
+    sigma = np.empty(raw.shape[1])
+    for start in range(0, raw.shape[1], block_columns):
+        sigma[start:start + block_columns] = raw[:, start:start + block_columns].std(axis=0, dtype=np.float64)
+    return sigma
+
+
+def _selectAndScale(raw, index, design, dtype, sparse=False):
+    """
+    Writes raw[:, index] / 255 into a freshly allocated C-contiguous array of
+    dtype, after a leading column of ones if design. With sparse, builds a
+    CSR matrix from the non-zero uint8 pixels instead.
+    """
+    if sparse:
+        import scipy.sparse as sp
+        data = sp.csr_matrix(raw[:, index])
+        data = sp.csr_matrix((np.divide(data.data, 255.0, dtype=dtype), data.indices, data.indptr),
+                             shape=data.shape)
+        if design:
+            data = sp.hstack([np.ones((raw.shape[0], 1), dtype=dtype), data], format='csr')
+        return data
+
+    offset = 1 if design else 0
+    data = np.empty((raw.shape[0], index.size + offset), dtype=dtype)
+    if design:
+        data[:, 0] = 1
+    np.divide(raw[:, index], 255.0, out=data[:, offset:], dtype=dtype)
+    return data
+
+
+def preprocessRows(raw, index, design=False, dtype=np.float64):
+    """
+     preprocessRows applies the feature selection and scaling of preprocess()
+     to new images, e.g. at inference time.
+
+     Input:
+         raw: matrix of size N x 784 (or a single image of 784 values) of
+         pixel intensities 0 .. 255
+         index: the feature-selection index returned by preprocess
+         (return_index=True) or stored with a model
+         design: if True, prepend the column of ones of the bias
+         dtype: floating-point type of the result
+
+     Output:
+         data: matrix of size N x D, or N x (D + 1) with design
+    """
+    raw = np.atleast_2d(raw)
+    index = np.asarray(index)
+    if raw.ndim != 2 or raw.shape[1] != N_PIXELS:
+        raise ValueError("expected images of %d pixels, got shape %s" % (N_PIXELS, raw.shape))
+    return _selectAndScale(raw, index, design, dtype)
+
+
+class DesignMatrix(object):
+    """
+    Bias-augmented data matrix, built once and shared by every objective and
+    predict call.
+
+    X is a C-contiguous array of size N x (D + 1) whose first column is all
+    ones, so X.dot(w) gives the logits directly without a per-call hstack.
+    shape reports the N x D size of the underlying features so callers that
+    read n_feature from data.shape keep working. dtype defaults to the dtype
+    of data when it is floating point and to float64 otherwise. A
+    scipy.sparse data matrix gives a CSR X.
+    """
+
+    def __init__(self, data, dtype=None, augmented=False):
+        if augmented:
+            # data already carries the bias column (e.g. a shared memmap)
+            self.X = data
+            return
+        if dtype is None:
+            dtype = data.dtype if np.issubdtype(data.dtype, np.floating) else np.float64
+        n_data, n_feature = data.shape
+        if isSparse(data):
+            import scipy.sparse as sp
+            self.X = sp.hstack([np.ones((n_data, 1), dtype=dtype), data], format='csr', dtype=dtype)
+            return
+        self.X = np.empty((n_data, n_feature + 1), dtype=dtype, order='C')
+        self.X[:, 0] = 1
+        self.X[:, 1:] = data
+
+    @property
+    def shape(self):
+        return self.X.shape[0], self.X.shape[1] - 1
+
+    @property
+    def dtype(self):
+        return self.X.dtype
+
+    @property
+    def features(self):
+        """N x D view of the data without the bias column (a copy if sparse)"""
+        return self.X[:, 1:]
+
+    def __len__(self):
+        return self.X.shape[0]
+
+
+def designMatrix(data):
+    """
+    Returns the N x (D + 1) bias-augmented array for data. A DesignMatrix
+    hands back its cached buffer; a plain N x D array is augmented here,
+    which costs one copy per call.
+    """
+    if isinstance(data, DesignMatrix):
+        return data.X
+    return DesignMatrix(data).X
@@ -0,0 +1,218 @@
+"""
+Batch inference server for the models of model_registry.py
+
+Loads one model artifact, maps its weights once, and serves predictions over
+HTTP on a TCP port or a Unix socket:
+
+    POST /predict   {"pixels": [784 values]} or {"pixels": [[784 values], ...]}
+                    -> {"labels": [...]}
+    GET  /health    -> the model header without its feature index
+
+Images go through the same feature selection and /255 scaling as
+preprocess() (data.preprocessRows with the index stored in the model).
+Requests are not scored one at a time: a MicroBatcher thread collects the
+rows of concurrent requests until max_batch_size rows are waiting or the
+oldest has waited max_latency_ms, then scores them all with one X @ W.
+All three model types predict the class with the largest score.
+
+Usage: python -m mlp3.inference_server model_path [port | unix_socket_path]
+       [max_batch_size] [max_latency_ms]
+"""
+import json
+import os
+import queue
+import socketserver
+import sys
+import threading
+import time
+from concurrent.futures import Future
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+
+from .data import preprocessRows
+from .model_registry import loadModel
+
+MAX_BATCH_SIZE = 256
+MAX_LATENCY_MS = 2.0
+# listen() backlog of both servers; socketserver's default of 5 resets
+# connections as soon as a few dozen clients connect at once
+REQUEST_QUEUE_SIZE = 128
+
+
+class MicroBatcher(object):
+    """
+    Scores rows submitted from many threads in micro-batches on one worker
+    thread. submit returns a Future of the labels of its rows.
+    """
+
+    def __init__(self, W, index, max_batch_size=MAX_BATCH_SIZE, max_latency_ms=MAX_LATENCY_MS):
+        self.W = W
+        self.index = np.asarray(index)
+        self.max_batch_size = max_batch_size
+        self.max_latency = max_latency_ms / 1000.0
+        self.batches = 0
+        self.rows = 0
+        self._requests = queue.Queue()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def submit(self, raw):
+        """Queues raw images (784 values, or N x 784); returns a Future of N labels"""
+        future = Future()
+        self._requests.put((np.atleast_2d(raw), future))
+        return future
+
+    def predict(self, raw):
+        """Labels of raw images, scored in whatever micro-batch they join"""
+        return self.submit(raw).result()
+
+    def close(self):
+        self._stop.set()
+        self._thread.join()
+
+    def _collect(self):
+        # Blocks for the first request, then takes more until the batch is
+        # full or the first request's deadline passes
+        try:
+            first = self._requests.get(timeout=0.1)
+        except queue.Empty:
+            return []
+        batch = [first]
+        n_rows = first[0].shape[0]
+        deadline = time.perf_counter() + self.max_latency
+        while n_rows < self.max_batch_size:
+            remaining = deadline - time.perf_counter()
+            try:
+                item = self._requests.get(timeout=remaining) if remaining > 0 else self._requests.get_nowait()
+            except queue.Empty:
+                break
+            batch.append(item)
+            n_rows += item[0].shape[0]
+        return batch
+
+    def _run(self):
+        while not self._stop.is_set():
+            batch = self._collect()
+            if not batch:
+                continue
+            try:
+                X = preprocessRows(np.concatenate([raw for raw, _ in batch]), self.index, design=True,
+                                   dtype=self.W.dtype)
+                labels = np.argmax(X.dot(self.W), axis=1)
+            except Exception:
+                # Score the requests separately so one bad request fails alone
+                for raw, future in batch:
+                    try:
+                        X = preprocessRows(raw, self.index, design=True, dtype=self.W.dtype)
+                        future.set_result(np.argmax(X.dot(self.W), axis=1))
+                    except Exception as e:
+                        future.set_exception(e)
+                continue
+            self.batches += 1
+            self.rows += labels.size
+            start = 0
+            for raw, future in batch:
+                future.set_result(labels[start:start + raw.shape[0]])
+                start += raw.shape[0]
+
+
+class PredictHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self):
+        if self.path != '/health':
+            return self._reply(404, {'error': 'not found'})
+        header = dict(self.server.header)
+        header.pop('index', None)
+        header.update(batches=self.server.batcher.batches, rows=self.server.batcher.rows)
+        self._reply(200, header)
+
+    def do_POST(self):
+        if self.path != '/predict':
+            return self._reply(404, {'error': 'not found'})
+        try:
+            body = json.loads(self.rfile.read(int(self.headers.get('Content-Length', 0))))
+            labels = self.server.batcher.predict(np.asarray(body['pixels'], dtype=np.float64))
+        except (ValueError, KeyError, TypeError) as e:
+            return self._reply(400, {'error': str(e)})
+        self._reply(200, {'labels': labels.tolist()})
+
+    def _reply(self, status, payload):
+        body = json.dumps(payload).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def address_string(self):
+        # Unix-socket clients have no (host, port) address
+        return self.client_address[0] if self.client_address else 'unix'
+
+    def log_message(self, format, *args):
+        pass
+
+
+class TCPPredictHandler(PredictHandler):
+    # Headers and body are separate writes; without TCP_NODELAY each reply
+    # waits for the client's delayed ACK
+    disable_nagle_algorithm = True
+
+
+class TCPHTTPServer(ThreadingHTTPServer):
+    request_queue_size = REQUEST_QUEUE_SIZE
+
+
+class UnixHTTPServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+    request_queue_size = REQUEST_QUEUE_SIZE
+
+    def server_bind(self):
+        if os.path.exists(self.server_address):
+            os.unlink(self.server_address)
+        socketserver.UnixStreamServer.server_bind(self)
+
+
+def makeServer(model_path, address, max_batch_size=MAX_BATCH_SIZE, max_latency_ms=MAX_LATENCY_MS):
+    """
+     makeServer loads the model at model_path and binds the server.
+
+     Input:
+         model_path: artifact written by model_registry.saveModel
+         address: (host, port) for HTTP over TCP, or a path for HTTP over a
+         Unix socket
+         max_batch_size: rows that close a micro-batch early
+         max_latency_ms: longest a request waits for its batch to fill
+
+     Output:
+         server: the bound server; call serve_forever() to run it and
+         shutdown() then server_close() and server.batcher.close() to stop
+    """
+    W, header = loadModel(model_path)
+    if isinstance(address, str):
+        server = UnixHTTPServer(address, PredictHandler)
+    else:
+        server = TCPHTTPServer(address, TCPPredictHandler)
+    server.header = header
+    server.batcher = MicroBatcher(W, header['index'], max_batch_size, max_latency_ms)
+    return server
+
+
+if __name__ == "__main__":
+    model_path = sys.argv[1]
+    target = sys.argv[2] if len(sys.argv) > 2 else '8000'
+    max_batch_size = int(sys.argv[3]) if len(sys.argv) > 3 else MAX_BATCH_SIZE
+    max_latency_ms = float(sys.argv[4]) if len(sys.argv) > 4 else MAX_LATENCY_MS
+
+    address = ('127.0.0.1', int(target)) if target.isdigit() else target
+    server = makeServer(model_path, address, max_batch_size, max_latency_ms)
+    print("serving %s model %s on %s" % (server.header['model_type'], model_path, address))
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        server.batcher.close()
@@ -0,0 +1,146 @@
+"""
+Approximate-kernel mode for the RBF SVM experiment
+
+An exact RBF SVC costs roughly quadratic time in the number of training
+samples. Here the data is instead mapped through an explicit feature map
+whose inner products approximate the RBF kernel -- random Fourier features
+(sklearn's RBFSampler) or Nystroem with a configurable number of landmarks --
+and a linear model is trained on the mapped features: the linear SVM of
+svm_sweep.trainLinearSVM or the one-vs-all logistic objective (train.py).
+Both give a (D + 1) x n_class W, so fitting and scoring are linear in the
+number of samples.
+"""
+import time
+
+import numpy as np
+
+from . import profiling
+from .metrics import accuracy
+from .svm_sweep import _evalSets, resolveGamma, trainLinearSVM
+
+MAP_BATCH_SIZE = 5000
+
+
+def fitFeatureMap(data, method='rff', gamma='auto', n_components=1000, seed=0):
+    """
+     fitFeatureMap builds the approximate RBF feature map of data.
+
+     Input:
+         data: the training matrix of size N x D
+         method: 'rff' for random Fourier features or 'nystroem' for the
+         Nystroem map on n_components randomly chosen landmark rows
+         gamma: RBF kernel coefficient, a number or 'auto' (1 / D) as in SVC
+         n_components: dimension of the mapped features (number of random
+         frequencies or of landmarks)
+         seed: seed of the random frequencies or landmarks
+
+     Output:
+         feature_map: fitted transformer for mapFeatures
+    """
+    from sklearn.kernel_approximation import Nystroem, RBFSampler
+
+    gamma = resolveGamma(gamma, data)
+    if method == 'rff':
+        feature_map = RBFSampler(gamma=gamma, n_components=n_components, random_state=seed)
+    elif method == 'nystroem':
+        feature_map = Nystroem(kernel='rbf', gamma=gamma, n_components=min(n_components, data.shape[0]),
+                               random_state=seed)
+    else:
+        raise ValueError("method must be 'rff' or 'nystroem', got %r" % (method,))
+    return feature_map.fit(data)
+
+
+def mapFeatures(feature_map, data, batch_size=MAP_BATCH_SIZE):
+    """
+     mapFeatures applies feature_map to data in batches of rows, so the
+     intermediate kernel block never exceeds batch_size x n_components.
+
+     Output:
+         mapped: the mapped matrix of size N x n_components
+    """
+    mapped = None
+    for start in range(0, data.shape[0], batch_size):
+        stop = min(start + batch_size, data.shape[0])
+        block = feature_map.transform(data[start:stop])
+        if mapped is None:
+            mapped = np.empty((data.shape[0], block.shape[1]))
+        mapped[start:stop] = block
+    return mapped
+
+
+def _fitLinear(mapped, label, model, C):
+    if model == 'svm':
+        return trainLinearSVM(mapped, label, C=C)
+    if model == 'blr':
+        from .train import trainOneVsAll
+        Y = (np.reshape(label, (-1, 1)) == np.arange(int(np.max(label)) + 1)).astype(np.float64)
+        return trainOneVsAll(mapped, Y, joint=True)
+    raise ValueError("model must be 'svm' or 'blr', got %r" % (model,))
+
+
+def approxRBFResults(data, label, configs, eval_sets=None, name='train', model='svm'):
+    """
+     approxRBFResults trains a linear model on approximate RBF features for
+     each configuration and scores every evaluation set with it.
+
+     Input:
+         data: the training matrix of size N x D
+         label: vector of size N (or N x 1) of class labels 0 .. n_class - 1
+         configs: list of dicts with 'method' ('rff' or 'nystroem'), 'gamma',
+         'n_components', and optionally 'C' (default 1.0, ignored for blr)
+         and 'seed' (default 0). Consecutive configs with the same feature
+         map share the mapped training matrix.
+         eval_sets: list of (set_name, data, label) to score; defaults to the
+         training set under name
+         model: 'svm' for the liblinear SVM or 'blr' for one-vs-all Logistic
+         Regression
+
+     Output:
+         results: list of dicts, one per config, with 'kernel'
+         ('rbf-<method>'), 'gamma', 'C', 'n_components', 'model', 'map_time'
+         (time to fit the map and transform the training set, charged to
+         the config that built the map and 0.0 for the ones reusing it),
+         'fit_time' (map_time plus training, so the fit times add up to the
+         total), '<set_name>_accuracy',
+         '<set_name>_predict_time' (mapping included) and 'predict_time',
+         as in sweepSVC
+    """
+    eval_sets = _evalSets(data, label, eval_sets, name)
+    results = []
+    map_key = feature_map = mapped = None
+    for config in configs:
+        key = (config['method'], resolveGamma(config['gamma'], data), config['n_components'],
+               config.get('seed', 0))
+        map_time = 0.0
+        if key != map_key:
+            mapped = None
+            start = time.perf_counter()
+            with profiling.span('rbf_approx.map', method=key[0], gamma=key[1], n_components=key[2]):
+                feature_map = fitFeatureMap(data, config['method'], key[1], key[2], key[3])
+                mapped = mapFeatures(feature_map, data)
+            map_time = time.perf_counter() - start
+            map_key = key
+
+        result = {'kernel': 'rbf-' + config['method'], 'gamma': config['gamma'],
+                  'C': config.get('C', 1.0) if model == 'svm' else None,
+                  'n_components': mapped.shape[1], 'model': model, 'map_time': map_time}
+        start = time.perf_counter()
+        with profiling.span('rbf_approx.fit', model=model, C=result['C']):
+            W = _fitLinear(mapped, label, model, config.get('C', 1.0))
+        result['fit_time'] = map_time + time.perf_counter() - start
+
+        result['predict_time'] = 0.0
+        for set_name, set_data, set_label in eval_sets:
+            start = time.perf_counter()
+            predictions = np.empty(set_data.shape[0])
+            with profiling.span('rbf_approx.predict', model=model, set=set_name):
+                for first in range(0, set_data.shape[0], MAP_BATCH_SIZE):
+                    last = min(first + MAP_BATCH_SIZE, set_data.shape[0])
+                    block = feature_map.transform(set_data[first:last])
+                    predictions[first:last] = np.argmax(block.dot(W[1:]) + W[0], axis=1)
+            elapsed = time.perf_counter() - start
+            result[set_name + '_predict_time'] = elapsed
+            result['predict_time'] += elapsed
+            result[set_name + '_accuracy'] = accuracy(set_label, predictions)
+        results.append(result)
+    return results
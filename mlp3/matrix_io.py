@@ -0,0 +1,59 @@
+"""
+Saving and memory-mapping of data matrices, dense or CSR
+
+Used by the preprocess cache and by the worker pools, which map the data
+from disk instead of receiving pickled copies.
+"""
+import os
+import sys
+
+import numpy as np
+
+
+def isSparse(X):
+    """scipy.sparse.issparse(X), without importing scipy when X cannot be sparse"""
+    # A sparse matrix can only exist once scipy.sparse has been imported
+    sp = sys.modules.get('scipy.sparse')
+    return sp is not None and sp.issparse(X)
+
+
+def umaskedMode(mode):
+    """
+    Returns mode with the process umask applied: the permissions open() or
+    mkdir() would have given. tempfile.mkstemp and mkdtemp create files
+    0600 and directories 0700 instead, so anything they create for other
+    processes to read is chmod-ed to this before it is renamed into place.
+    """
+    try:
+        # Linux reports it without changing it
+        with open('/proc/self/status') as f:
+            umask = next(int(line.split()[1], 8) for line in f if line.startswith('Umask:'))
+    except (OSError, StopIteration):
+        umask = os.umask(0)
+        os.umask(umask)
+    return mode & ~umask
+
+
+def saveMatrix(path, X):
+    """
+    Saves X as path.npy, or a CSR matrix as its path.data.npy,
+    path.indices.npy, path.indptr.npy and path.shape.npy arrays so that
+    loadMatrix can memory-map it either way.
+    """
+    if isSparse(X):
+        X = X.tocsr()
+        for part in ('data', 'indices', 'indptr'):
+            np.save(path + '.' + part + '.npy', getattr(X, part))
+        np.save(path + '.shape.npy', np.array(X.shape))
+    else:
+        np.save(path + '.npy', X)
+
+
+def loadMatrix(path, mmap_mode='r'):
+    if os.path.exists(path + '.npy'):
+        return np.load(path + '.npy', mmap_mode=mmap_mode)
+    import scipy.sparse as sp
+    data, indices, indptr = (np.load(path + '.' + part + '.npy', mmap_mode=mmap_mode)
+                             for part in ('data', 'indices', 'indptr'))
+    shape = tuple(np.load(path + '.shape.npy'))
+    return sp.csr_matrix((data, indices, indptr), shape=shape, copy=False)
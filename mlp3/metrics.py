@@ -0,0 +1,87 @@
+"""
+Classification metrics for the predictions of the logistic models and SVMs
+
+Labels and predictions may be given as N x 1 or N vectors of any numeric
+type. Everything is derived from a confusion matrix counted with one
+np.bincount pass, and ConfusionMatrix accumulates it over chunks so huge
+prediction sets never have to be held at once.
+"""
+import numpy as np
+
+from . import profiling
+
+
+def accuracy(label, predicted):
+    """Percentage of predicted that equals label"""
+    label = np.ravel(label)
+    predicted = np.ravel(predicted)
+    if label.shape != predicted.shape:
+        raise ValueError("label and predicted have %d and %d entries" % (label.size, predicted.size))
+    with profiling.span('metrics.accuracy', rows=label.size):
+        return 100.0 * np.count_nonzero(label == predicted) / label.size
+
+
+class ConfusionMatrix(object):
+    """
+    Confusion matrix of n_class classes labelled 0 .. n_class - 1, updated
+    chunk by chunk. counts[i, j] is the number of rows of class i predicted
+    as class j.
+    """
+
+    def __init__(self, n_class=10):
+        self.n_class = n_class
+        self.counts = np.zeros((n_class, n_class), dtype=np.int64)
+
+    def update(self, label, predicted):
+        """Adds one chunk of labels and predictions; returns self"""
+        label = np.ravel(label).astype(np.int64)
+        predicted = np.ravel(predicted).astype(np.int64)
+        if label.shape != predicted.shape:
+            raise ValueError("label and predicted have %d and %d entries" % (label.size, predicted.size))
+        if label.size and (min(label.min(), predicted.min()) < 0
+                           or max(label.max(), predicted.max()) >= self.n_class):
+            raise ValueError("labels must be in 0 .. %d" % (self.n_class - 1))
+        n = self.n_class
+        with profiling.span('metrics.confusion', rows=label.size):
+            self.counts += np.bincount(label * n + predicted, minlength=n * n).reshape(n, n)
+        return self
+
+    def total(self):
+        return int(self.counts.sum())
+
+    def accuracy(self):
+        """Percentage of correct predictions"""
+        return 100.0 * np.trace(self.counts) / max(self.total(), 1)
+
+    def precision(self):
+        """Per-class fraction of the rows predicted as the class that are in it"""
+        return _ratio(np.diag(self.counts), self.counts.sum(axis=0))
+
+    def recall(self):
+        """Per-class fraction of the rows of the class that are predicted as it"""
+        return _ratio(np.diag(self.counts), self.counts.sum(axis=1))
+
+    def perClassError(self):
+        """Per-class percentage of the rows of the class that are misclassified"""
+        return 100.0 * (1 - self.recall())
+
+
+def _ratio(numerator, denominator):
+    # Classes that never occur get 0 rather than a division warning
+    return np.divide(numerator, denominator, out=np.zeros(len(numerator)), where=denominator > 0)
+
+
+def confusionMatrix(label, predicted, n_class=10):
+    """Returns the n_class x n_class confusion matrix of one set of predictions"""
+    return ConfusionMatrix(n_class).update(label, predicted).counts
+
+
+def evaluateChunks(chunks, n_class=10):
+    """
+     evaluateChunks accumulates a ConfusionMatrix over an iterable of
+     (label, predicted) chunks, e.g. from scoring a data set batch by batch.
+    """
+    matrix = ConfusionMatrix(n_class)
+    for label, predicted in chunks:
+        matrix.update(label, predicted)
+    return matrix
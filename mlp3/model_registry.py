@@ -0,0 +1,161 @@
+"""
+Model artifacts for the trained weight matrices
+
+An artifact is a small header followed by the raw weights:
+
+    8 bytes   magic b'MLP3MDL\\0'
+    4 bytes   format version (little-endian uint32)
+    4 bytes   header length in bytes (little-endian uint32)
+    header    UTF-8 JSON: model type, dtype, shape, feature-selection index,
+              its SHA-256, training metadata and the offset of the weights
+    padding   zeros up to the next WEIGHT_ALIGNMENT boundary
+    weights   the W matrix in C order
+
+Loading maps the weights read-only instead of unpickling them, so starting an
+inference process costs a header parse, and every process that maps the same
+file shares its pages. A model is only usable on data preprocessed with the
+same feature-selection index, which loadModel checks.
+"""
+import hashlib
+import json
+import os
+import struct
+import tempfile
+
+import numpy as np
+
+from .matrix_io import umaskedMode
+
+MAGIC = b'MLP3MDL\0'
+FORMAT_VERSION = 1
+WEIGHT_ALIGNMENT = 64
+MODEL_TYPES = ('blr', 'mlr', 'linear-svm')
+_PREAMBLE = struct.Struct('<8sII')
+
+
+def indexDigest(index):
+    """SHA-256 of a feature-selection index, as stored in the header"""
+    return hashlib.sha256(np.ascontiguousarray(index, dtype='<i8').tobytes()).hexdigest()
+
+
+def saveModel(path, W, model_type, index, metadata=None):
+    """
+     saveModel writes W as a model artifact. The file is written next to
+     path and renamed into place, so readers never see a partial artifact.
+
+     Input:
+         path: file to write
+         W: the matrix of weight of size (D + 1) x n_class, bias in the first
+         row, as returned by trainOneVsAll, the mlr fit or trainLinearSVM
+         model_type: 'blr', 'mlr' or 'linear-svm'
+         index: the feature-selection index returned by preprocess
+         (return_index=True); D must equal its length
+         metadata: JSON-serializable dict of training details
+
+     Output:
+         header: the header dict written to the file
+    """
+    if model_type not in MODEL_TYPES:
+        raise ValueError("model_type must be one of %s, got %r" % (MODEL_TYPES, model_type))
+    W = np.ascontiguousarray(W)
+    index = np.asarray(index, dtype=np.int64)
+    if W.ndim != 2 or W.shape[0] != index.size + 1:
+        raise ValueError("W has shape %s; expected (%d, n_class) for %d selected features"
+                         % (W.shape, index.size + 1, index.size))
+
+    header = {'model_type': model_type, 'dtype': W.dtype.newbyteorder('<').str, 'shape': list(W.shape),
+              'index': index.tolist(), 'index_sha256': indexDigest(index), 'metadata': metadata or {}}
+    # The offset depends on the header length, which depends on the offset
+    header['offset'] = 0
+    while True:
+        encoded = json.dumps(header, sort_keys=True).encode('utf-8')
+        offset = -(-(_PREAMBLE.size + len(encoded)) // WEIGHT_ALIGNMENT) * WEIGHT_ALIGNMENT
+        if offset == header['offset']:
+            break
+        header['offset'] = offset
+
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(prefix='.model-', dir=directory)
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(_PREAMBLE.pack(MAGIC, FORMAT_VERSION, len(encoded)))
+            f.write(encoded)
+            f.write(b'\0' * (offset - _PREAMBLE.size - len(encoded)))
+            f.write(W.astype(header['dtype'], copy=False).tobytes())
+        # mkstemp creates the file 0600; give it the mode open() would have
+        # so workers running as other users can map it
+        os.chmod(tmp_path, umaskedMode(0o666))
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+    return header
+
+
+def readHeader(path):
+    """Returns the header dict of the artifact at path"""
+    with open(path, 'rb') as f:
+        preamble = f.read(_PREAMBLE.size)
+        if len(preamble) < _PREAMBLE.size:
+            raise ValueError("%s is not a model artifact" % path)
+        magic, version, length = _PREAMBLE.unpack(preamble)
+        if magic != MAGIC:
+            raise ValueError("%s is not a model artifact" % path)
+        if version != FORMAT_VERSION:
+            raise ValueError("%s has format version %d; this code reads %d" % (path, version, FORMAT_VERSION))
+        return json.loads(f.read(length).decode('utf-8'))
+
+
+def loadModel(path, index=None, mmap=True):
+    """
+     loadModel reads a model artifact.
+
+     Input:
+         path: file written by saveModel
+         index: if given, the feature-selection index of the data the model
+         will score; a ValueError is raised unless it equals the model's
+         mmap: if True, W is a read-only memory map of the file; otherwise
+         it is read into memory
+
+     Output:
+         W: the matrix of weight of size (D + 1) x n_class
+         header: the header dict (model_type, dtype, shape, index, metadata)
+    """
+    header = readHeader(path)
+    if index is not None and indexDigest(index) != header['index_sha256']:
+        raise ValueError("%s was trained on a different feature selection (%d features) than the data "
+                         "(%d features)" % (path, len(header['index']), np.size(index)))
+    shape = tuple(header['shape'])
+    if mmap:
+        W = np.memmap(path, dtype=header['dtype'], mode='r', offset=header['offset'], shape=shape)
+    else:
+        with open(path, 'rb') as f:
+            f.seek(header['offset'])
+            W = np.fromfile(f, dtype=header['dtype'], count=int(np.prod(shape))).reshape(shape)
+    return W, header
+
+
+class ModelRegistry(object):
+    """
+    Directory of named model artifacts, one <name>.model file per model.
+    """
+
+    def __init__(self, root):
+        self.root = root
+        os.makedirs(root, exist_ok=True)
+
+    def path(self, name):
+        return os.path.join(self.root, name + '.model')
+
+    def register(self, name, W, model_type, index, metadata=None):
+        """Saves W under name, replacing any model of that name; returns its header"""
+        return saveModel(self.path(name), W, model_type, index, metadata)
+
+    def load(self, name, index=None, mmap=True):
+        """Returns (W, header) of the model registered under name"""
+        return loadModel(self.path(name), index, mmap)
+
+    def models(self):
+        """Returns {name: header} of every registered model"""
+        names = sorted(f[:-len('.model')] for f in os.listdir(self.root) if f.endswith('.model'))
+        return dict((name, readHeader(self.path(name))) for name in names)
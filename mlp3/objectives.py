@@ -0,0 +1,260 @@
+"""
+Error functions and gradients of the one-vs-all (blr) and multinomial (mlr)
+Logistic Regression models, in the form scipy.optimize.minimize takes with
+jac=True
+"""
+import numpy as np
+
+from .data import designMatrix
+
+
+def _logistic(z):
+    # (log(1 + e^z), sigmoid(z)) from a single e^-|z|, which cannot
+    # overflow: sigmoid(z) is 1 / (1 + e^-z) for z >= 0 and e^z / (1 + e^z)
+    # below, and log(1 + e^z) is max(z, 0) + log(1 + e^-|z|)
+    e = np.exp(-np.abs(z))
+    denominator = 1 + e
+    theta = np.where(z >= 0, 1, e) / denominator
+    return np.maximum(z, 0) + np.log1p(e), theta.astype(e.dtype, copy=False)
+
+
+def sigmoid(z):
+    return _logistic(np.asarray(z))[1]
+
+
+def blrObjFunction(initialWeights, *args):
+    """
+    blrObjFunction computes 2-class Logistic Regression error function and
+    its gradient.
+
+    Input:
+        initialWeights: the weight vector (w_k) of size (D + 1) x 1 
+        train_data: the data matrix of size N x D, or a DesignMatrix
+        labeli: the label vector (y_k) of size N x 1 where each entry can be either 0 or 1 representing the label of corresponding feature vector
+
+    Output: 
+        error: the scalar value of error function of 2-class logistic regression
+        error_grad: the vector of size (D+1) x 1 representing the gradient of
+                    error function
+    """
+    train_data, labeli = args
+
+    n_data = train_data.shape[0]
+    n_features = train_data.shape[1]
+    error = 0
+    error_grad = np.zeros((n_features + 1, 1))
+
+    # One GEMV for the logits of every row
+    X = designMatrix(train_data)
+    # Everything touching X stays in X's dtype so float32 data is never
+    # upcast; the error is accumulated and the gradient returned in float64
+    # for the optimizer
+    w = np.ravel(initialWeights).astype(X.dtype, copy=False)
+    y = np.ravel(labeli).astype(X.dtype, copy=False)
+    z = X.dot(w)
+    softplus, theta = _logistic(z)
+
+    # Error: -[y log(theta) + (1 - y) log(1 - theta)] == log(1 + e^z) - y z
+    error = np.sum(softplus - y * z, dtype=np.float64) / n_data
+
+    # error_grad, reusing theta from the forward pass
+    residual = theta - y
+    error_grad = X.T.dot(residual).astype(np.float64) / n_data
+
+    return error, error_grad
+
+
+def blrObjFunctionJoint(params, *args):
+    """
+    blrObjFunctionJoint computes the error function and gradient of n_class
+    independent 2-class Logistic Regression classifiers in one pass over the
+    data, so all one-vs-all classifiers can be trained by a single optimizer.
+
+    Input:
+        params: the weight vector of size ((D + 1) * n_class), flattened from
+                a (D + 1) x n_class matrix whose column k is the weight
+                vector of class k
+        train_data: the data matrix of size N x D, or a DesignMatrix
+        labeli: the label matrix of size N x n_class where column k is 1 for
+                the rows of class k and 0 elsewhere
+
+    Output:
+        error: the sum over classes of the blrObjFunction error of each column
+        error_grad: the vector of size ((D+1) * n_class); column k of the
+                    (D+1) x n_class gradient equals blrObjFunction's gradient
+                    for class k
+    """
+    train_data, labeli = args
+
+    n_data = train_data.shape[0]
+    n_features = train_data.shape[1]
+    n_class = labeli.shape[1]
+
+    # One N x n_class GEMM for the logits of every classifier
+    X = designMatrix(train_data)
+    W = np.reshape(params, (n_features + 1, n_class)).astype(X.dtype, copy=False)
+    Y = np.asarray(labeli).astype(X.dtype, copy=False)
+    z = X.dot(W)
+    softplus, theta = _logistic(z)
+
+    # The columns' errors are separable, so their sum keeps each class's
+    # gradient independent of the others
+    error = np.sum(softplus - Y * z, dtype=np.float64) / n_data
+
+    error_grad = X.T.dot(theta - Y).astype(np.float64) / n_data
+
+    return error, np.ravel(error_grad)
+
+
+def mlrObjFunction(params, *args):
+    """
+    mlrObjFunction computes multi-class Logistic Regression error function and
+    its gradient.
+
+    Input:
+        params: the weight vector of size ((D + 1) * n_class), flattened from
+                a (D + 1) x n_class matrix
+        train_data: the data matrix of size N x D, or a DesignMatrix
+        labeli: the label matrix of size N x n_class where each row is the
+                one-hot encoding of the label of corresponding feature vector
+        n_class: the number of classes (optional, defaults to labeli.shape[1])
+
+    Output:
+        error: the scalar value of error function of multi-class logistic regression
+        error_grad: the vector of size ((D+1) * n_class) representing the
+                    flattened (D+1) x n_class gradient of error function
+    """
+    train_data, labeli = args[0], args[1]
+    n_class = args[2] if len(args) > 2 else labeli.shape[1]
+
+    n_data = train_data.shape[0]
+    n_feature = train_data.shape[1]
+    error = 0
+    error_grad = np.zeros((n_feature + 1, n_class))
+
+    # N x n_class logits from one matmul
+    X = designMatrix(train_data)
+    initialWeights_b = np.reshape(params, (n_feature + 1, n_class)).astype(X.dtype, copy=False)
+    Y = np.asarray(labeli).astype(X.dtype, copy=False)
+    z = X.dot(initialWeights_b)
+
+    # Stable softmax: shift each row by its max before exponentiating
+    z -= z.max(axis=1, keepdims=True)
+    log_norm = np.log(np.exp(z).sum(axis=1, keepdims=True))
+    log_theta = z - log_norm
+    theta = np.exp(log_theta)
+
+    # Error: cross-entropy -sum_n sum_k y_nk log(theta_nk)
+    error = -np.sum(Y * log_theta, dtype=np.float64)
+
+    # error_grad = X^T (theta - Y)
+    residual = theta - Y
+    error_grad = X.T.dot(residual).astype(np.float64)
+
+    error_grad = np.ravel(error_grad)
+
+    return error, error_grad
+
+
+# Hessian-vector products, in the form minimize takes as hessp, for the
+# Newton-CG and trust-region solvers of solvers.py. The Hessian is never
+# formed: H v costs two passes over the data (X v, then X^T times the
+# weighted result). The curvature of the current weights, which every
+# product at the same weights shares, is returned by the *Curvature
+# functions so a solver can compute it once per iterate and pass it in.
+
+def blrCurvature(params, *args):
+    """
+    blrCurvature returns the N x 1 curvature theta (1 - theta) / N of the
+    blrObjFunction error at params (args as for blrObjFunction)
+    """
+    train_data, labeli = args
+    X = designMatrix(train_data)
+    theta = sigmoid(X.dot(np.ravel(params).astype(X.dtype, copy=False)))
+    return (theta * (1 - theta) / train_data.shape[0]).reshape(-1, 1)
+
+
+def blrHessp(params, v, *args, curvature=None):
+    """
+    blrHessp computes the product of the Hessian of blrObjFunction at params
+    with a vector.
+
+    Input:
+        params: the weight vector of size (D + 1) x 1
+        v: the vector of size (D + 1) x 1 to multiply
+        train_data, labeli: as for blrObjFunction
+        curvature: blrCurvature(params, *args), computed here if not given
+
+    Output:
+        Hv: the vector of size (D+1) X^T diag(theta (1 - theta)) X v / N
+    """
+    if curvature is None:
+        curvature = blrCurvature(params, *args)
+    X = designMatrix(args[0])
+    Xv = X.dot(np.ravel(v).astype(X.dtype, copy=False))
+    return X.T.dot(curvature[:, 0] * Xv).astype(np.float64)
+
+
+def blrCurvatureJoint(params, *args):
+    """
+    blrCurvatureJoint returns the N x n_class curvature of
+    blrObjFunctionJoint at params, one blrCurvature column per class
+    """
+    train_data, labeli = args
+    n_class = labeli.shape[1]
+    X = designMatrix(train_data)
+    theta = sigmoid(X.dot(np.reshape(params, (-1, n_class)).astype(X.dtype, copy=False)))
+    return theta * (1 - theta) / train_data.shape[0]
+
+
+def blrHesspJoint(params, v, *args, curvature=None):
+    """
+    blrHesspJoint computes the product of the block-diagonal Hessian of
+    blrObjFunctionJoint at params with a vector of size ((D + 1) * n_class),
+    class k's block being blrHessp of column k.
+    """
+    if curvature is None:
+        curvature = blrCurvatureJoint(params, *args)
+    X = designMatrix(args[0])
+    V = np.reshape(v, (-1, curvature.shape[1])).astype(X.dtype, copy=False)
+    return np.ravel(X.T.dot(curvature * X.dot(V)).astype(np.float64))
+
+
+def mlrCurvature(params, *args):
+    """
+    mlrCurvature returns the N x n_class softmax probabilities theta at
+    params (args as for mlrObjFunction), which determine the Hessian of
+    mlrObjFunction
+    """
+    train_data, labeli = args[0], args[1]
+    n_class = args[2] if len(args) > 2 else labeli.shape[1]
+    X = designMatrix(train_data)
+    z = X.dot(np.reshape(params, (-1, n_class)).astype(X.dtype, copy=False))
+    z -= z.max(axis=1, keepdims=True)
+    theta = np.exp(z)
+    theta /= theta.sum(axis=1, keepdims=True)
+    return theta
+
+
+def mlrHessp(params, v, *args, curvature=None):
+    """
+    mlrHessp computes the product of the Hessian of mlrObjFunction at params
+    with a vector.
+
+    Input:
+        params: the weight vector of size ((D + 1) * n_class)
+        v: the vector of size ((D + 1) * n_class) to multiply, flattened
+           like params
+        train_data, labeli, n_class: as for mlrObjFunction
+        curvature: mlrCurvature(params, *args), computed here if not given
+
+    Output:
+        Hv: the vector of size ((D+1) * n_class), flattened from
+            X^T (theta * A - theta * sum_k (theta * A)_k) with A = X V
+    """
+    if curvature is None:
+        curvature = mlrCurvature(params, *args)
+    X = designMatrix(args[0])
+    A = curvature * X.dot(np.reshape(v, (-1, curvature.shape[1])).astype(X.dtype, copy=False))
+    A -= curvature * A.sum(axis=1, keepdims=True)
+    return np.ravel(X.T.dot(A).astype(np.float64))
@@ -0,0 +1,84 @@
+"""
+Prediction with the (D + 1) x n_class weight matrices of the logistic models
+"""
+import numpy as np
+
+from . import profiling
+from .data import DesignMatrix
+
+# Rows scored per X @ W product in blrPredict and mlrPredict
+PREDICT_CHUNK_SIZE = 10000
+
+
+def _logits(W, data, start, stop):
+    """Returns the (stop - start) x n_class logits of rows start:stop of data"""
+    if isinstance(data, DesignMatrix):
+        X = data.X[start:stop]
+        return X.dot(W.astype(X.dtype, copy=False))
+    rows = data[start:stop]
+    W = W.astype(rows.dtype, copy=False)
+    return rows.dot(W[1:]) + W[0]
+
+
+def blrPredict(W, data, chunk_size=PREDICT_CHUNK_SIZE, first_above_threshold=False):
+    """
+     blrObjFunction predicts the label of data given the data and parameter W 
+     of Logistic Regression
+     
+     Input:
+         W: the matrix of weight of size (D + 1) x 10. Each column is the weight 
+         vector of a Logistic Regression classifier.
+         data: the data matrix of size N x D, or a DesignMatrix
+         chunk_size: number of rows scored per X @ W product, which bounds the
+         extra memory to chunk_size x 10 logits
+         first_above_threshold: if True, reproduce the original rule that
+         picks the first class whose probability is above 0.5 (class 0 if
+         none is); otherwise pick the class with the highest probability
+         
+     Output: 
+         label: vector of size N x 1 representing the predicted label of 
+         corresponding feature vector given in data matrix
+
+    """
+    label = np.zeros((data.shape[0], 1))
+
+    with profiling.span('blrPredict', rows=data.shape[0]):
+        for start in range(0, data.shape[0], chunk_size):
+            stop = min(start + chunk_size, data.shape[0])
+            z = _logits(W, data, start, stop)
+            if first_above_threshold:
+                # sigmoid(z) > 0.5 exactly when z > 0; argmax finds the first True
+                label[start:stop, 0] = np.argmax(z > 0, axis=1)
+            else:
+                # sigmoid is monotonic, so the most probable class has the largest logit
+                label[start:stop, 0] = np.argmax(z, axis=1)
+
+    return label
+
+
+def mlrPredict(W, data, chunk_size=PREDICT_CHUNK_SIZE):
+    """
+     mlrObjFunction predicts the label of data given the data and parameter W
+     of Logistic Regression
+
+     Input:
+         W: the matrix of weight of size (D + 1) x 10. Each column is the weight
+         vector of a Logistic Regression classifier.
+         data: the data matrix of size N x D, or a DesignMatrix
+         chunk_size: number of rows scored per X @ W product, which bounds the
+         extra memory to chunk_size x 10 logits
+
+     Output:
+         label: vector of size N x 1 representing the predicted label of
+         corresponding feature vector given in data matrix
+
+    """
+    label = np.zeros((data.shape[0], 1))
+
+    # The softmax is monotonic in the logits, so no exp is needed
+    with profiling.span('mlrPredict', rows=data.shape[0]):
+        for start in range(0, data.shape[0], chunk_size):
+            stop = min(start + chunk_size, data.shape[0])
+            label[start:stop, 0] = np.argmax(_logits(W, data, start, stop), axis=1)
+
+    return label
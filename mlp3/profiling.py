@@ -0,0 +1,206 @@
+"""
+Stage-level timing for the experiments and the modules they drive
+
+Code marks its stages with named spans and wraps hot functions such as the
+objectives with timed(); both cost one flag check while tracing is off, which
+is the default. After enable(), every span records its wall time, nesting
+and the process's peak RSS when it ended, and every timed function keeps a
+call count and latency totals. writeTrace saves the result as JSON or CSV.
+enable(cprofile=True) also runs cProfile, whose stats dumpCProfile writes
+as a .prof file that snakeviz or flameprof turn into a flame graph.
+
+Spans nest per thread. A worker process records its own spans after
+enable() and hands them back with exportState() for the parent to merge().
+"""
+import cProfile
+import csv
+import json
+import os
+import resource
+import sys
+import threading
+import time
+from contextlib import contextmanager
+
+_state = {'enabled': False, 'origin': 0.0, 'profiler': None}
+_spans = []
+_calls = {}
+_lock = threading.Lock()
+_local = threading.local()
+
+
+def enable(cprofile=False):
+    """Starts recording, discarding anything recorded before; cprofile also starts cProfile"""
+    with _lock:
+        del _spans[:]
+        _calls.clear()
+        _state['origin'] = time.perf_counter()
+        _state['enabled'] = True
+    if cprofile:
+        _state['profiler'] = cProfile.Profile()
+        _state['profiler'].enable()
+
+
+def disable():
+    _state['enabled'] = False
+    if _state['profiler'] is not None:
+        _state['profiler'].disable()
+
+
+def dumpCProfile(path):
+    """Stops cProfile (if enable started it) and writes its stats to path"""
+    profiler = _state['profiler']
+    if profiler is None:
+        raise ValueError("cProfile was not started; call enable(cprofile=True)")
+    profiler.disable()
+    profiler.dump_stats(path)
+
+
+def enabled():
+    return _state['enabled']
+
+
+def _maxRSSMB():
+    # ru_maxrss is in kilobytes on Linux and bytes on macOS
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss / (1024.0 * 1024.0) if sys.platform == 'darwin' else rss / 1024.0
+
+
+@contextmanager
+def _record(name, attrs):
+    # Spans keep absolute perf_counter times, which are comparable across
+    # processes on one machine, so worker spans merge onto the same clock
+    stack = getattr(_local, 'stack', None)
+    if stack is None:
+        stack = _local.stack = []
+    parent = stack[-1] if stack else None
+    stack.append(name)
+    start = time.perf_counter()
+    try:
+        yield attrs
+    finally:
+        duration = time.perf_counter() - start
+        stack.pop()
+        span = {'name': name, 'start': start, 'duration': duration, 'depth': len(stack), 'parent': parent,
+                'pid': os.getpid(), 'thread': threading.current_thread().name, 'max_rss_mb': _maxRSSMB(),
+                'attrs': attrs}
+        with _lock:
+            _spans.append(span)
+
+
+class _NoSpan(object):
+    def __enter__(self):
+        # Attributes set inside a disabled span go nowhere
+        return {}
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NO_SPAN = _NoSpan()
+
+
+def span(name, **attrs):
+    """
+     span returns a context manager that records the block it wraps as a
+     span called name, with attrs (JSON-serializable) attached. It yields
+     the attrs dict, so results known only at the end can be added to it.
+    """
+    if not _state['enabled']:
+        return _NO_SPAN
+    return _record(name, attrs)
+
+
+def timed(name, fn):
+    """
+     timed wraps fn so that, while tracing is on, each call adds to the call
+     count and latency totals of name. Used for functions called too often
+     for a span per call, such as the objectives inside minimize.
+    """
+    def wrapper(*args, **kwargs):
+        if not _state['enabled']:
+            return fn(*args, **kwargs)
+        start = time.perf_counter()
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            elapsed = time.perf_counter() - start
+            with _lock:
+                stats = _calls.setdefault(name, {'count': 0, 'total': 0.0, 'min': float('inf'), 'max': 0.0})
+                stats['count'] += 1
+                stats['total'] += elapsed
+                stats['min'] = min(stats['min'], elapsed)
+                stats['max'] = max(stats['max'], elapsed)
+    wrapper.__name__ = getattr(fn, '__name__', name)
+    wrapper.__doc__ = fn.__doc__
+    return wrapper
+
+
+def spans():
+    """Recorded spans in the order they ended, start in seconds since enable()"""
+    with _lock:
+        return [dict(s, start=s['start'] - _state['origin']) for s in _spans]
+
+
+def calls():
+    """{name: {'count', 'total', 'mean', 'min', 'max'}} of the timed functions"""
+    with _lock:
+        return dict((name, dict(stats, mean=stats['total'] / stats['count'])) for name, stats in _calls.items())
+
+
+def exportState():
+    """Raw spans and call statistics, to return from a worker process"""
+    with _lock:
+        return list(_spans), dict((name, dict(stats)) for name, stats in _calls.items())
+
+
+def merge(state):
+    """Adds the exportState() of a worker process to this process's records"""
+    worker_spans, worker_calls = state
+    with _lock:
+        _spans.extend(worker_spans)
+        for name, stats in worker_calls.items():
+            mine = _calls.setdefault(name, {'count': 0, 'total': 0.0, 'min': float('inf'), 'max': 0.0})
+            mine['count'] += stats['count']
+            mine['total'] += stats['total']
+            mine['min'] = min(mine['min'], stats['min'])
+            mine['max'] = max(mine['max'], stats['max'])
+
+
+def summary():
+    """Text table of total time per span name and of the timed functions"""
+    totals = {}
+    for s in spans():
+        count, total = totals.get(s['name'], (0, 0.0))
+        totals[s['name']] = (count + 1, total + s['duration'])
+    lines = ["%-32s %8s %12s" % ("span", "count", "total (s)")]
+    for name, (count, total) in sorted(totals.items(), key=lambda item: -item[1][1]):
+        lines.append("%-32s %8d %12.4f" % (name, count, total))
+    lines.append("%-32s %8s %12s %12s" % ("function", "calls", "total (s)", "mean (ms)"))
+    for name, stats in sorted(calls().items(), key=lambda item: -item[1]['total']):
+        lines.append("%-32s %8d %12.4f %12.3f" % (name, stats['count'], stats['total'], 1e3 * stats['mean']))
+    return '\n'.join(lines)
+
+
+def writeTrace(path):
+    """
+     writeTrace saves the spans and function statistics to path: as JSON
+     ({'spans': [...], 'calls': {...}}) if path ends in .json, else as CSV
+     with one row per span (kind 'span') and per timed function (kind
+     'calls').
+    """
+    if path.endswith('.json'):
+        with open(path, 'w') as f:
+            json.dump({'spans': spans(), 'calls': calls()}, f, indent=1)
+        return
+    columns = ['kind', 'name', 'start', 'duration', 'depth', 'parent', 'pid', 'thread', 'max_rss_mb',
+               'count', 'mean', 'attrs']
+    with open(path, 'w', newline='') as f:
+        writer = csv.DictWriter(f, columns, extrasaction='ignore')
+        writer.writeheader()
+        for s in spans():
+            writer.writerow(dict(s, kind='span', attrs=json.dumps(s['attrs'])))
+        for name, stats in calls().items():
+            writer.writerow({'kind': 'calls', 'name': name, 'duration': stats['total'],
+                             'count': stats['count'], 'mean': stats['mean'],
+                             'attrs': json.dumps({'min': stats['min'], 'max': stats['max']})})
@@ -0,0 +1,140 @@
+"""
+Optimizer backends for the logistic objectives
+
+solve() runs scipy.optimize.minimize with one of:
+
+    cg            nonlinear conjugate gradient: the original method, with the
+                  original fixed budget of 100 iterations
+    lbfgs         L-BFGS-B with a 10-pair curvature memory
+    newton-cg     line-search Newton with the steps solved by conjugate
+                  gradient on Hessian-vector products
+    trust-ncg     trust-region Newton, Steihaug conjugate gradient subproblem
+    trust-krylov  trust-region Newton, Lanczos (GLTR) subproblem
+
+The Newton methods take the hessp of the objective from HESSIAN_PRODUCTS,
+so the Hessian is never formed. The curvature of the current iterate is
+computed once and shared by all the products taken there.
+
+Except for cg, the solvers stop on convergence. Their default options set
+'rtol', the gradient norm to reach relative to the gradient at the initial
+weights, so one setting fits both the mean (blr) and summed (mlr) errors.
+newton-cg has no gradient test and stops when its average step falls under
+'xtol'. 'maxiter' is only a safety cap for the converging solvers.
+
+The result has minimize's fields plus 'solver', 'nhev' (Hessian-vector
+products) and 'time' (wall seconds).
+"""
+import time
+
+import numpy as np
+
+from . import profiling
+from .objectives import (blrCurvature, blrCurvatureJoint, blrHessp, blrHesspJoint, blrObjFunction,
+                         blrObjFunctionJoint, mlrCurvature, mlrHessp, mlrObjFunction)
+
+# solver name -> scipy.optimize.minimize method
+SOLVERS = {'cg': 'CG', 'lbfgs': 'L-BFGS-B', 'newton-cg': 'Newton-CG', 'trust-ncg': 'trust-ncg',
+           'trust-krylov': 'trust-krylov'}
+
+DEFAULT_OPTIONS = {
+    'cg': {'maxiter': 100},
+    'lbfgs': {'maxiter': 1000, 'rtol': 1e-4},
+    'newton-cg': {'maxiter': 200, 'xtol': 1e-5},
+    'trust-ncg': {'maxiter': 200, 'rtol': 1e-4},
+    'trust-krylov': {'maxiter': 200, 'rtol': 1e-4},
+}
+
+# The solvers whose gradient test uses the max norm; the trust-region
+# solvers use the 2-norm
+_MAX_NORM_SOLVERS = ('cg', 'lbfgs')
+
+# objective -> (curvature, hessp) for the Newton solvers
+HESSIAN_PRODUCTS = {
+    blrObjFunction: (blrCurvature, blrHessp),
+    blrObjFunctionJoint: (blrCurvatureJoint, blrHesspJoint),
+    mlrObjFunction: (mlrCurvature, mlrHessp),
+}
+
+
+class _Hessp(object):
+    # hessp for minimize that computes the curvature once per iterate
+    def __init__(self, curvature, product):
+        self.curvature = curvature
+        self.product = product
+        self.calls = 0
+        self._x = None
+        self._state = None
+
+    def __call__(self, x, v, *args):
+        if self._x is None or not np.array_equal(x, self._x):
+            self._x = np.array(x, copy=True)
+            self._state = self.curvature(x, *args)
+        self.calls += 1
+        return self.product(x, v, *args, curvature=self._state)
+
+
+def solverOptions(solver, opts=None):
+    """Returns DEFAULT_OPTIONS[solver] updated with opts"""
+    if solver not in SOLVERS:
+        raise ValueError("solver must be one of %s, got %r" % (', '.join(sorted(SOLVERS)), solver))
+    options = dict(DEFAULT_OPTIONS[solver])
+    options.update(opts or {})
+    return options
+
+
+def gradientTolerance(objective, weights, args, solver, rtol, name=None):
+    """
+     Returns the absolute gradient tolerance of solver for rtol: rtol times
+     the norm of objective's gradient at weights, in the norm of the
+     solver's gradient test (timed under name, as in solve)
+    """
+    _, grad = profiling.timed(name or objective.__name__, objective)(weights, *args)
+    norm = np.inf if solver in _MAX_NORM_SOLVERS else 2
+    return rtol * max(np.linalg.norm(grad, ord=norm), np.finfo(np.float64).tiny)
+
+
+def solve(objective, initialWeights, args, solver='cg', opts=None, callback=None, name=None):
+    """
+     solve minimizes objective from initialWeights with the given solver.
+
+     Input:
+         objective: an error function returning (error, error_grad), such as
+         blrObjFunction; the Newton solvers need it in HESSIAN_PRODUCTS
+         initialWeights: the initial weight vector
+         args: the extra arguments of objective
+         solver: a key of SOLVERS
+         opts: options updating DEFAULT_OPTIONS[solver]; 'rtol' is turned
+         into the solver's absolute gradient tolerance unless opts gives
+         that tolerance as 'gtol', the others are passed to minimize
+         callback: passed to minimize, called with the weights after every
+         iteration
+         name: the name objective and its hessp are timed under in the
+         profiling call statistics (default objective.__name__)
+
+     Output:
+         result: minimize's OptimizeResult with 'solver', 'nhev' and 'time'
+    """
+    from scipy.optimize import minimize
+
+    options = solverOptions(solver, opts)
+    name = name or objective.__name__
+    timed = profiling.timed(name, objective)
+    start = time.perf_counter()
+    rtol = options.pop('rtol', None)
+    n_start = 0
+    if rtol is not None and 'gtol' not in (opts or {}):
+        options['gtol'] = gradientTolerance(objective, initialWeights, args, solver, rtol, name)
+        n_start = 1
+    hessp = None
+    if solver not in ('cg', 'lbfgs'):
+        if objective not in HESSIAN_PRODUCTS:
+            raise ValueError("solver %r needs the Hessian-vector product of %s" % (solver, name))
+        hessp = _Hessp(*HESSIAN_PRODUCTS[objective])
+        hessp.product = profiling.timed(HESSIAN_PRODUCTS[objective][1].__name__, hessp.product)
+    result = minimize(timed, initialWeights, jac=True, args=args, method=SOLVERS[solver], hessp=hessp,
+                      callback=callback, options=options)
+    result.nfev = int(result.nfev) + n_start
+    result.solver = solver
+    result.nhev = hessp.calls if hessp is not None else 0
+    result.time = time.perf_counter() - start
+    return result
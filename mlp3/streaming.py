@@ -0,0 +1,183 @@
+"""
+Streaming out-of-core training for the logistic models
+
+The training set is stored as .npy shards which are memory-mapped, so only
+the current mini-batches are resident whatever the dataset size. A prefetch
+thread reads the next batches while the current one is being used, and the
+weights are updated with SGD, momentum or Adam. The result is a (D + 1) x
+n_class W in the same layout blrPredict and mlrPredict consume.
+"""
+import os
+import queue
+import threading
+
+import numpy as np
+
+from .objectives import blrObjFunctionJoint, mlrObjFunction
+
+
+def writeShards(data, label, directory, shard_size=10000, prefix='shard', shuffle=True, seed=0):
+    """
+     writeShards splits a data set into .npy shards that trainStreaming can
+     memory-map.
+
+     Input:
+         data: the data matrix of size N x D
+         label: vector of size N (or N x 1) with the integer class of each row
+         directory: where the shard files are written
+         shard_size: number of rows per shard
+         prefix: file name prefix of the shards
+         shuffle: if True, write the rows in a random order, so every shard
+         mixes all classes even when data is sorted by class as
+         preprocess() returns it
+         seed: seed of the row order
+
+     Output:
+         shards: list of (data_path, label_path) tuples, one per shard
+    """
+    label = np.ravel(label)
+    n_data = data.shape[0]
+    order = np.random.RandomState(seed).permutation(n_data) if shuffle else np.arange(n_data)
+    shards = []
+    for i, start in enumerate(range(0, n_data, shard_size)):
+        # Sorted so each shard gathers its rows in one forward sweep
+        rows = np.sort(order[start:start + shard_size])
+        data_path = os.path.join(directory, '%s%05d_data.npy' % (prefix, i))
+        label_path = os.path.join(directory, '%s%05d_label.npy' % (prefix, i))
+        np.save(data_path, np.asarray(data[rows]))
+        np.save(label_path, label[rows].astype(np.int64))
+        shards.append((data_path, label_path))
+    return shards
+
+
+def iterMiniBatches(shards, batch_size, n_epochs=1, shuffle=True, seed=0):
+    """
+     iterMiniBatches yields (epoch, data, label) mini-batches read from
+     memory-mapped shards. Shards are visited in a random order each epoch,
+     and each shard's rows are dealt into batches through a fresh random
+     permutation, so batch contents change from epoch to epoch; rows are
+     copied out of the map one batch at a time.
+    """
+    rng = np.random.RandomState(seed)
+    for epoch in range(n_epochs):
+        order = rng.permutation(len(shards)) if shuffle else range(len(shards))
+        for s in order:
+            data_path, label_path = shards[s]
+            data = np.load(data_path, mmap_mode='r')
+            label = np.load(label_path, mmap_mode='r')
+            if shuffle:
+                rows = rng.permutation(data.shape[0])
+                for start in range(0, data.shape[0], batch_size):
+                    batch = np.sort(rows[start:start + batch_size])
+                    yield epoch, np.asarray(data[batch]), np.asarray(label[batch])
+            else:
+                for start in range(0, data.shape[0], batch_size):
+                    stop = min(start + batch_size, data.shape[0])
+                    yield epoch, np.array(data[start:stop]), np.array(label[start:stop])
+            del data, label
+
+
+def prefetch(iterator, depth=2):
+    """
+     prefetch runs iterator on a background thread and keeps up to depth
+     items ready, so reading the next batch overlaps with computing on the
+     current one. Exceptions raised by iterator are re-raised here.
+    """
+    items = queue.Queue(maxsize=depth)
+    done = object()
+    stop = threading.Event()
+
+    def worker():
+        try:
+            for item in iterator:
+                while not stop.is_set():
+                    try:
+                        items.put(item, timeout=0.1)
+                        break
+                    except queue.Full:
+                        pass
+                if stop.is_set():
+                    return
+            items.put(done)
+        except BaseException as e:
+            items.put(e)
+
+    thread = threading.Thread(target=worker, daemon=True)
+    thread.start()
+    try:
+        while True:
+            item = items.get()
+            if item is done:
+                return
+            if isinstance(item, BaseException):
+                raise item
+            yield item
+    finally:
+        stop.set()
+
+
+def _update(W, grad, state, optimizer, learning_rate, beta1=0.9, beta2=0.999, eps=1e-8):
+    if optimizer == 'sgd':
+        W -= learning_rate * grad
+    elif optimizer == 'momentum':
+        velocity = state.setdefault('velocity', np.zeros_like(W))
+        velocity *= beta1
+        velocity += grad
+        W -= learning_rate * velocity
+    elif optimizer == 'adam':
+        m = state.setdefault('m', np.zeros_like(W))
+        v = state.setdefault('v', np.zeros_like(W))
+        state['t'] = state.get('t', 0) + 1
+        m *= beta1
+        m += (1 - beta1) * grad
+        v *= beta2
+        v += (1 - beta2) * grad * grad
+        m_hat = m / (1 - beta1 ** state['t'])
+        v_hat = v / (1 - beta2 ** state['t'])
+        W -= learning_rate * m_hat / (np.sqrt(v_hat) + eps)
+    else:
+        raise ValueError("optimizer must be 'sgd', 'momentum' or 'adam', got %r" % (optimizer,))
+
+
+def trainStreaming(shards, n_class=10, model='blr', optimizer='adam', learning_rate=0.01,
+                   batch_size=256, n_epochs=5, prefetch_depth=2, seed=0):
+    """
+     trainStreaming trains one-vs-all (blr) or multinomial (mlr) Logistic
+     Regression by mini-batch gradient descent over memory-mapped shards.
+
+     Input:
+         shards: list of (data_path, label_path) tuples as returned by
+         writeShards
+         n_class: number of classes
+         model: 'blr' for the one-vs-all objective (blrObjFunctionJoint) or
+         'mlr' for the softmax objective (mlrObjFunction)
+         optimizer: 'sgd', 'momentum' or 'adam'
+         learning_rate: step size of the optimizer
+         batch_size: rows per mini-batch
+         n_epochs: passes over the shards
+         prefetch_depth: batches read ahead by the prefetch thread
+         seed: seed of the shard and batch order
+
+     Output:
+         W: the matrix of weight of size (D + 1) x n_class
+    """
+    if model not in ('blr', 'mlr'):
+        raise ValueError("model must be 'blr' or 'mlr', got %r" % (model,))
+
+    n_feature = np.load(shards[0][0], mmap_mode='r').shape[1]
+    W = np.zeros((n_feature + 1, n_class))
+    identity = np.eye(n_class)
+    state = {}
+
+    batches = prefetch(iterMiniBatches(shards, batch_size, n_epochs, seed=seed), prefetch_depth)
+    for epoch, data, label in batches:
+        Y = identity[label]
+        if model == 'blr':
+            error, error_grad = blrObjFunctionJoint(W.ravel(), data, Y)
+        else:
+            # mlrObjFunction sums over rows; scale to a per-row gradient
+            error, error_grad = mlrObjFunction(W.ravel(), data, Y, n_class)
+            error_grad = error_grad / data.shape[0]
+        _update(W, error_grad.reshape(W.shape), state, optimizer, learning_rate)
+
+    return W
@@ -0,0 +1,808 @@
+"""
+SVM hyperparameter sweep for the Support Vector Machine experiment
+
+Each configuration is fitted once on the training split, and every split is
+scored with that model from batched decision values.
+
+The RBF kernel matrix for a fixed gamma does not depend on C, so sweepSVC
+computes it once per (dataset, kernel, gamma) and trains every C value on it
+through SVC(kernel='precomputed'). Kernel matrices live in a KernelCache with
+an LRU memory budget; a matrix too large for the budget is never built.
+Those configurations are fitted one one-vs-one class pair at a time instead,
+on the pair's block of the kernel, which is cached and shared by all the C
+values. Only when even a pair block exceeds the budget does the fit bypass
+the cache and use libsvm's own kernel-row cache sized to the budget.
+
+cPathSVC walks the C values as a regularization path, starting each fit
+from the previous C's dual coefficients. sklearn's SVC cannot be given
+initial coefficients, so the path uses its own SMO solver that follows
+libsvm's working-set selection and stopping rule. That solver is a Python
+loop without libsvm's shrinking, several times slower than SVC despite the
+fewer iterations, so the path is a reference for alpha-seeding, not a
+faster way to run the sweep.
+
+trainLinearSVM fits the linear kernel with liblinear's dual coordinate
+descent, whose cost grows linearly with the number of samples, and returns
+its weights in the (D + 1) x n_class layout of the logistic W.
+bench_linear_svm.py checks its accuracy against SVC's linear kernel.
+
+runSweep runs a declarative grid of configurations on a process pool whose
+size is limited by the memory each fit needs, appending every result to a
+JSON-lines file as it finishes so that an interrupted sweep can resume.
+"""
+import hashlib
+import itertools
+import json
+import os
+import shutil
+import tempfile
+import time
+from collections import OrderedDict
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+import numpy as np
+
+from . import profiling
+from .matrix_io import isSparse, loadMatrix, saveMatrix
+from .metrics import accuracy
+
+# Rows scored per decision_function call in predictBatched
+PREDICT_BATCH_SIZE = 5000
+
+
+def resolveGamma(gamma, data):
+    """Returns the numeric gamma SVC uses for data; 'auto' is 1 / n_features"""
+    if gamma == 'auto':
+        return 1.0 / data.shape[1]
+    return float(gamma)
+
+
+def kernelMatrix(kernel, rows, cols, gamma=None):
+    """Returns the len(rows) x len(cols) kernel matrix of SVC's kernel"""
+    if kernel not in ('linear', 'rbf'):
+        raise ValueError("kernel must be 'linear' or 'rbf', got %r" % (kernel,))
+    from sklearn.metrics.pairwise import linear_kernel, rbf_kernel
+
+    with profiling.span('kernelMatrix', kernel=kernel, rows=rows.shape[0], cols=cols.shape[0]):
+        if kernel == 'linear':
+            return linear_kernel(rows, cols)
+        return rbf_kernel(rows, cols, gamma=gamma)
+
+
+class KernelCache(object):
+    """
+    LRU cache of kernel matrices with a memory budget.
+
+    Entries are keyed by (row dataset, column dataset, kernel, gamma), plus
+    the class pair for the blocks of one one-vs-one pair. The cache records
+    hits, misses and the computation time that the hits saved, and the fits
+    that bypassed it because their kernel exceeded the budget.
+    """
+
+    def __init__(self, budget_mb=2048):
+        self.budget = int(budget_mb * 1024 * 1024)
+        self.entries = OrderedDict()
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self.compute_time = 0.0
+        self.saved_time = 0.0
+        self.bypassed = 0
+        self._cost = {}
+
+    def fits(self, n_rows, n_cols, itemsize=8):
+        return n_rows * n_cols * itemsize <= self.budget
+
+    def get(self, key, compute):
+        """Returns the cached matrix for key, calling compute() on a miss"""
+        if key in self.entries:
+            self.entries.move_to_end(key)
+            self.hits += 1
+            self.saved_time += self._cost[key]
+            return self.entries[key]
+
+        self.misses += 1
+        start = time.perf_counter()
+        value = compute()
+        elapsed = time.perf_counter() - start
+        self.compute_time += elapsed
+
+        if value.nbytes <= self.budget:
+            while self.size + value.nbytes > self.budget:
+                old_key, old_value = self.entries.popitem(last=False)
+                self.size -= old_value.nbytes
+                del self._cost[old_key]
+            self.entries[key] = value
+            self.size += value.nbytes
+            self._cost[key] = elapsed
+        return value
+
+    def hitRate(self):
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def report(self):
+        lookups = self.hits + self.misses
+        if lookups:
+            line = ("kernel cache: %d hits, %d misses (hit rate %.0f%%), %.1f MB held, "
+                    "%.1f s computing, %.1f s saved"
+                    % (self.hits, self.misses, 100 * self.hitRate(), self.size / 1e6,
+                       self.compute_time, self.saved_time))
+        else:
+            line = "kernel cache: not used"
+        if self.bypassed:
+            line += ("; bypassed by %d fit(s) whose kernel exceeds the %g MB budget "
+                     "(libsvm's row cache used instead)" % (self.bypassed, self.budget / (1024 * 1024)))
+        return line
+
+
+def _evalSets(data, label, eval_sets, name):
+    if eval_sets is None:
+        return [(name, data, label)]
+    return list(eval_sets)
+
+
+def _ovoVote(decision, n_class):
+    """
+    Index of the class winning the one-vs-one vote, from an N x n_pairs
+    decision matrix in SVC's pair order; ties go to the lower class, as in
+    libsvm.
+    """
+    votes = np.zeros((decision.shape[0], n_class), dtype=np.int32)
+    rows = np.arange(decision.shape[0])
+    p = 0
+    for a in range(n_class):
+        for b in range(a + 1, n_class):
+            votes[rows, np.where(decision[:, p] > 0, a, b)] += 1
+            p += 1
+    return np.argmax(votes, axis=1)
+
+
+def predictBatched(clf, data, batch_size=PREDICT_BATCH_SIZE, rows=None):
+    """
+     predictBatched computes the one-vs-one decision values of a fitted SVC
+     on data batch_size rows at a time, and the predictions voted from them.
+
+     Input:
+         clf: a fitted SVC with decision_function_shape='ovo'
+         data: the data matrix to score, or for a precomputed-kernel clf a
+         callable rows(start, stop) returning those rows of the kernel
+         batch_size: rows scored per decision_function call
+         rows: number of rows, when data is a callable
+
+     Output:
+         predictions: vector of predicted labels
+         decision: N x n_pairs matrix of decision values, which callers can
+         keep instead of scoring the same data again
+    """
+    n_data = rows if callable(data) else data.shape[0]
+    decision = np.empty((n_data, len(clf.classes_) * (len(clf.classes_) - 1) // 2))
+    for start in range(0, n_data, batch_size):
+        stop = min(start + batch_size, n_data)
+        batch = data(start, stop) if callable(data) else data[start:stop]
+        decision[start:stop] = np.reshape(clf.decision_function(batch), (stop - start, -1))
+    return clf.classes_[_ovoVote(decision, len(clf.classes_))], decision
+
+
+def _classPairs(y, classes):
+    # (a, b, training rows) of every one-vs-one class pair, in SVC's pair order
+    return [(a, b, np.flatnonzero((y == classes[a]) | (y == classes[b])))
+            for a in range(len(classes)) for b in range(a + 1, len(classes))]
+
+
+def _sweepPairs(data, y, configs, kernel, gamma, eval_sets, name, cache, decisions=None):
+    """
+    Fits the configurations of one (kernel, gamma) one class pair at a time
+    on the pair's cached kernel block, which all the C values share, and
+    scores the evaluation sets by one-vs-one vote. Each set's kernel is taken
+    against the support vectors of all the fits, in row chunks within the
+    cache budget, and shared by the configurations, so its time is split
+    evenly among them. Returns the results in the order of configs.
+    """
+    from sklearn.svm import SVC
+
+    classes = np.unique(y)
+    n_class = len(classes)
+    pairs = _classPairs(y, classes)
+    results = [dict(config, fit_time=0.0, predict_time=0.0, precomputed='pairs') for config in configs]
+    # models[k][p]: (support rows of data, dual coefficients, intercept)
+    models = [[] for config in configs]
+    for p, (a, b, rows) in enumerate(pairs):
+        # +1 for class a, so that a positive decision votes for it
+        y_pair = np.where(y[rows] == classes[a], 1, -1)
+        for k, config in enumerate(configs):
+            K_pair = cache.get((name, name, kernel, gamma, 'pair', p),
+                               lambda: kernelMatrix(kernel, data[rows], data[rows], gamma))
+            clf = SVC(C=config['C'], kernel='precomputed')
+            start = time.perf_counter()
+            with profiling.span('svc.fit', kernel=kernel, gamma=gamma, C=config['C'], precomputed='pairs',
+                                pair=p):
+                clf.fit(K_pair, y_pair)
+            results[k]['fit_time'] += time.perf_counter() - start
+            models[k].append((rows[clf.support_], clf.dual_coef_[0], clf.intercept_[0]))
+
+    support = np.unique(np.concatenate([model[0] for pair_models in models for model in pair_models]))
+    columns = [[np.searchsorted(support, model[0]) for model in pair_models] for pair_models in models]
+    chunk = max(1, min(PREDICT_BATCH_SIZE, cache.budget // (8 * support.size)))
+    for set_name, set_data, set_label in eval_sets:
+        start = time.perf_counter()
+        set_decisions = [np.empty((set_data.shape[0], len(pairs))) for config in configs]
+        with profiling.span('svc.predict', kernel=kernel, gamma=gamma, set=set_name, precomputed='pairs'):
+            for first in range(0, set_data.shape[0], chunk):
+                last = min(first + chunk, set_data.shape[0])
+                K_set = kernelMatrix(kernel, set_data[first:last], data[support], gamma)
+                for pair_models, pair_columns, decision in zip(models, columns, set_decisions):
+                    for p, ((_, coef, intercept), cols) in enumerate(zip(pair_models, pair_columns)):
+                        decision[first:last, p] = K_set[:, cols].dot(coef) + intercept
+        elapsed = (time.perf_counter() - start) / len(configs)
+        for config, result, decision in zip(configs, results, set_decisions):
+            result[set_name + '_predict_time'] = elapsed
+            result['predict_time'] += elapsed
+            result[set_name + '_accuracy'] = accuracy(set_label, classes[_ovoVote(decision, n_class)])
+            if decisions is not None:
+                decisions[(configKey(config, name, data), set_name)] = decision
+    return results
+
+
+def sweepSVC(data, label, configs, eval_sets=None, name='train', cache=None, decisions=None):
+    """
+     sweepSVC fits SVC once for each configuration on (data, label) and
+     scores every evaluation set with that fitted model.
+
+     Input:
+         data: the training data matrix of size N x D (dense or scipy.sparse)
+         label: vector of size N (or N x 1) of class labels
+         configs: list of dicts with keys 'kernel' ('linear' or 'rbf'), 'C'
+         and, for rbf, 'gamma' (a number or 'auto')
+         eval_sets: list of (set_name, data, label) to score; default is the
+         training data alone, under name
+         name: identifies data in the kernel cache; use a different name for
+         every distinct data matrix (and for every evaluation set)
+         cache: a KernelCache shared across calls (a new one if None)
+         decisions: if a dict is given, the decision values of every
+         (configuration, set) are stored in it under (configKey(config, name,
+         data), set_name)
+
+     Output:
+         results: list of dicts, one per configuration, with the
+         configuration plus 'fit_time', '<set_name>_accuracy' (percent) and
+         '<set_name>_predict_time' for every evaluation set, the total
+         'predict_time' (seconds) and 'precomputed' (True if the cached
+         kernel was used, 'pairs' if its blocks of the class pairs were, False
+         if the fit bypassed the cache)
+    """
+    from sklearn.svm import SVC
+
+    if cache is None:
+        cache = KernelCache()
+    y = np.ravel(label)
+    n_data = data.shape[0]
+    eval_sets = _evalSets(data, label, eval_sets, name)
+    largest_pair = max(rows.size for a, b, rows in _classPairs(y, np.unique(y)))
+
+    results = [None] * len(configs)
+    # (kernel, gamma) -> indices of the configs fitted by class pair
+    by_pair = OrderedDict()
+    for i, config in enumerate(configs):
+        kernel = config['kernel']
+        gamma = resolveGamma(config.get('gamma', 'auto'), data) if kernel == 'rbf' else None
+        result = dict(config)
+        precomputed = cache.fits(n_data, n_data)
+        if not precomputed and cache.fits(largest_pair, largest_pair):
+            by_pair.setdefault((kernel, gamma), []).append(i)
+            continue
+
+        if precomputed:
+            K = cache.get((name, name, kernel, gamma), lambda: kernelMatrix(kernel, data, data, gamma))
+            clf = SVC(C=config['C'], kernel='precomputed', decision_function_shape='ovo')
+            fit_input = K
+        else:
+            # Even a class pair is too large to hold: let libsvm cache kernel
+            # rows within the budget
+            cache.bypassed += 1
+            clf = SVC(C=config['C'], kernel=kernel, gamma=gamma if gamma is not None else 'auto',
+                      cache_size=cache.budget / (1024 * 1024), decision_function_shape='ovo')
+            fit_input = data
+
+        start = time.perf_counter()
+        with profiling.span('svc.fit', kernel=kernel, gamma=gamma, C=config['C'], precomputed=precomputed):
+            clf.fit(fit_input, y)
+        result['fit_time'] = time.perf_counter() - start
+
+        result['predict_time'] = 0.0
+        for set_name, set_data, set_label in eval_sets:
+            start = time.perf_counter()
+            with profiling.span('svc.predict', kernel=kernel, gamma=gamma, C=config['C'], set=set_name):
+                if not precomputed:
+                    predictions, decision = predictBatched(clf, set_data)
+                elif cache.fits(set_data.shape[0], n_data):
+                    K_set = cache.get((set_name, name, kernel, gamma),
+                                      lambda: kernelMatrix(kernel, set_data, data, gamma))
+                    predictions, decision = predictBatched(clf, K_set)
+                else:
+                    kernel_rows = lambda a, b: kernelMatrix(kernel, set_data[a:b], data, gamma)
+                    predictions, decision = predictBatched(clf, kernel_rows, rows=set_data.shape[0])
+            elapsed = time.perf_counter() - start
+            result[set_name + '_predict_time'] = elapsed
+            result['predict_time'] += elapsed
+            result[set_name + '_accuracy'] = accuracy(set_label, predictions)
+            if decisions is not None:
+                decisions[(configKey(config, name, data), set_name)] = decision
+
+        result['precomputed'] = precomputed
+        results[i] = result
+
+    for (kernel, gamma), indices in by_pair.items():
+        pair_results = _sweepPairs(data, y, [configs[i] for i in indices], kernel, gamma, eval_sets, name, cache,
+                                   decisions)
+        for i, result in zip(indices, pair_results):
+            results[i] = result
+    return results
+
+
+def trainLinearSVM(data, label, C=1.0, tol=1e-4, max_iter=10000):
+    """
+     trainLinearSVM fits a one-vs-rest linear SVM (hinge loss, as SVC's linear
+     kernel) with liblinear's coordinate-descent solver.
+
+     Input:
+         data: the data matrix of size N x D (dense or scipy.sparse)
+         label: vector of size N (or N x 1) of class labels 0 .. n_class - 1
+         C: penalty parameter, as for SVC
+         tol, max_iter: stopping tolerance and iteration cap of liblinear;
+         a fit that reaches max_iter is recorded as not converged in its
+         'linear_svm.fit' span
+
+     Output:
+         W: the matrix of weight of size (D + 1) x n_class whose first row is
+         the bias, the same layout as the logistic W, so blrPredict and
+         mlrPredict score it directly (the class with the largest decision
+         value wins)
+    """
+    from sklearn.svm import LinearSVC
+
+    clf = LinearSVC(C=C, loss='hinge', dual=True, tol=tol, max_iter=max_iter)
+    with profiling.span('linear_svm.fit', C=C) as attrs:
+        clf.fit(data, np.ravel(label))
+        attrs['n_iter'] = int(clf.n_iter_)
+        attrs['converged'] = bool(clf.n_iter_ < max_iter)
+    coef, intercept = clf.coef_, clf.intercept_
+    if coef.shape[0] == 1:
+        # Two classes: liblinear keeps one hyperplane for the second class
+        coef = np.vstack([-coef, coef])
+        intercept = np.hstack([-intercept, intercept])
+    W = np.zeros((data.shape[1] + 1, int(clf.classes_.max()) + 1))
+    W[0, clf.classes_.astype(int)] = intercept
+    W[1:, clf.classes_.astype(int)] = coef.T
+    return W
+
+
+def linearSVMResults(data, label, C=1.0, eval_sets=None, name='train'):
+    """
+     linearSVMResults trains trainLinearSVM on (data, label) and scores every
+     evaluation set with it.
+
+     Output:
+         result: dict with 'kernel' ('linear-primal'), 'C', 'fit_time',
+         '<set_name>_accuracy', '<set_name>_predict_time' and 'predict_time',
+         as in sweepSVC, plus the weight matrix 'W'
+         (not JSON-serializable; pop it before writing the result out)
+    """
+    eval_sets = _evalSets(data, label, eval_sets, name)
+    result = {'kernel': 'linear-primal', 'C': C}
+
+    start = time.perf_counter()
+    W = trainLinearSVM(data, label, C=C)
+    result['fit_time'] = time.perf_counter() - start
+
+    result['predict_time'] = 0.0
+    for set_name, set_data, set_label in eval_sets:
+        start = time.perf_counter()
+        predictions = np.empty(set_data.shape[0])
+        with profiling.span('linear_svm.predict', C=C, set=set_name):
+            for first in range(0, set_data.shape[0], PREDICT_BATCH_SIZE):
+                last = min(first + PREDICT_BATCH_SIZE, set_data.shape[0])
+                predictions[first:last] = np.argmax(set_data[first:last].dot(W[1:]) + W[0], axis=1)
+        elapsed = time.perf_counter() - start
+        result[set_name + '_predict_time'] = elapsed
+        result['predict_time'] += elapsed
+        result[set_name + '_accuracy'] = accuracy(set_label, predictions)
+    result['W'] = W
+    return result
+
+
+def _solveDual(K, y, C, alpha, eps=1e-3, tau=1e-12, max_iter=10000000):
+    """
+    Solves the binary SVC dual on kernel K with labels y in {-1, +1} by SMO,
+    using the working-set selection, update and stopping rule of libsvm, and
+    starting from the feasible alpha given.
+
+    Returns (alpha, rho, n_iter); the decision function is
+    sum_t alpha_t y_t K(x, x_t) - rho.
+    """
+    QD = np.diag(K).copy()
+    alpha = alpha.copy()
+    # Gradient of the dual objective 1/2 a^T Q a - e^T a, with Q = yy^T * K
+    G = -np.ones(len(y))
+    support = np.flatnonzero(alpha)
+    if support.size:
+        G += y * K[:, support].dot(alpha[support] * y[support])
+
+    positive = y > 0
+    n_iter = 0
+    while n_iter < max_iter:
+        # i: maximal violator of the KKT conditions in I_up
+        v = -y * G
+        up = np.where(positive, alpha < C, alpha > 0)
+        low = np.where(positive, alpha > 0, alpha < C)
+        if not up.any() or not low.any():
+            break
+        v_up = np.where(up, v, -np.inf)
+        i = int(np.argmax(v_up))
+        Gmax = v_up[i]
+        Gmax2 = np.max(np.where(low, -v, -np.inf))
+        if Gmax + Gmax2 < eps:
+            break
+
+        # j: second-order choice in I_low that most decreases the objective
+        grad_diff = Gmax - v
+        quad = QD[i] + QD - 2 * K[i]
+        quad[quad <= 0] = tau
+        candidates = low & (grad_diff > 0)
+        if not candidates.any():
+            break
+        obj = np.where(candidates, -(grad_diff * grad_diff) / quad, np.inf)
+        j = int(np.argmin(obj))
+
+        old_i, old_j = alpha[i], alpha[j]
+        Q_ij = y[i] * y[j] * K[i, j]
+        if y[i] != y[j]:
+            quad_coef = QD[i] + QD[j] + 2 * Q_ij
+            delta = (-G[i] - G[j]) / max(quad_coef, tau)
+            diff = old_i - old_j
+            alpha[i] += delta
+            alpha[j] += delta
+            if diff > 0:
+                if alpha[j] < 0:
+                    alpha[j] = 0
+                    alpha[i] = diff
+            elif alpha[i] < 0:
+                alpha[i] = 0
+                alpha[j] = -diff
+            if diff > 0:
+                if alpha[i] > C:
+                    alpha[i] = C
+                    alpha[j] = C - diff
+            elif alpha[j] > C:
+                alpha[j] = C
+                alpha[i] = C + diff
+        else:
+            quad_coef = QD[i] + QD[j] - 2 * Q_ij
+            delta = (G[i] - G[j]) / max(quad_coef, tau)
+            total = old_i + old_j
+            alpha[i] -= delta
+            alpha[j] += delta
+            if total > C:
+                if alpha[i] > C:
+                    alpha[i] = C
+                    alpha[j] = total - C
+                if alpha[j] > C:
+                    alpha[j] = C
+                    alpha[i] = total - C
+            else:
+                if alpha[j] < 0:
+                    alpha[j] = 0
+                    alpha[i] = total
+                if alpha[i] < 0:
+                    alpha[i] = 0
+                    alpha[j] = total
+
+        G += y * (K[i] * (y[i] * (alpha[i] - old_i)) + K[j] * (y[j] * (alpha[j] - old_j)))
+        n_iter += 1
+
+    # rho: average of y G over free vectors, or the midpoint of the bounds
+    yG = y * G
+    free = (alpha > 0) & (alpha < C)
+    if free.any():
+        rho = yG[free].mean()
+    else:
+        upper = np.where(positive, alpha >= C, alpha <= 0)
+        ub = np.min(yG[~upper]) if (~upper).any() else np.inf
+        lb = np.max(yG[upper]) if upper.any() else -np.inf
+        rho = (ub + lb) / 2
+    return alpha, rho, n_iter
+
+
+def cPathSVC(data, label, cvals, kernel='rbf', gamma='auto', eval_sets=None, name='train',
+             cache=None, warm_start=True, verify=False):
+    """
+     cPathSVC fits one-vs-one SVC along a path of C values on (data, label),
+     seeding each fit with the dual coefficients of the previous C
+     (alpha-seeding), and scores every evaluation set with each fitted model.
+
+     The binary problems are solved by _solveDual, which follows libsvm's SMO
+     and stopping rule (tol 1e-3), one class pair at a time on the pair's
+     block of the kernel, cached under the same key as sweepSVC's, so the N x
+     N kernel is never built. Each fit meets the same optimality tolerance as
+     an independent SVC fit, so the decision values agree within it, but
+     points near a boundary can vote differently and the accuracies can
+     differ slightly; pass verify to compare them. When C shrinks, the seed
+     is scaled by C_new / C_old to stay feasible. The evaluation sets are
+     scored against the pair's support vectors only, in row chunks within
+     the cache budget.
+
+     _solveDual runs in Python and has no shrinking: it takes fewer
+     iterations along the path, but it is much slower than libsvm (7 to 13
+     times per fit on MNIST), so use sweepSVC to fit the C values quickly.
+
+     Input:
+         data: the training data matrix of size N x D (dense or scipy.sparse)
+         label: vector of size N (or N x 1) of class labels
+         cvals: the C values, fitted in this order
+         kernel, gamma: as for SVC ('linear' or 'rbf'; gamma may be 'auto')
+         eval_sets, name, cache: as for sweepSVC; the kernel block of the
+         largest class pair must fit the cache (a ValueError otherwise)
+         warm_start: if False, every C starts from alpha = 0
+         verify: if True, also fit every C independently with sweepSVC and
+         add its '<set_name>_independent_accuracy' for every evaluation set
+
+     Output:
+         results: list of dicts, one per C, with 'C', 'fit_time' (seconds),
+         'iterations' (SMO steps over all class pairs) and
+         '<set_name>_accuracy' (percent) for every evaluation set, plus
+         'independent_fit_time' with verify
+    """
+    if cache is None:
+        cache = KernelCache()
+    y = np.ravel(label)
+    classes = np.unique(y)
+    n_class = len(classes)
+    pairs = _classPairs(y, classes)
+    largest_pair = max(rows.size for a, b, rows in pairs)
+    if not cache.fits(largest_pair, largest_pair):
+        raise ValueError("the %d x %d kernel block of the largest class pair does not fit the cache budget"
+                         % (largest_pair, largest_pair))
+    gamma_value = resolveGamma(gamma, data) if kernel == 'rbf' else None
+    eval_sets = _evalSets(data, label, eval_sets, name)
+
+    results = [{'C': C, 'fit_time': 0.0, 'iterations': 0} for C in cvals]
+    decisions = [[np.empty((set_data.shape[0], len(pairs))) for set_name, set_data, set_label in eval_sets]
+                 for C in cvals]
+
+    solveDual = profiling.timed('_solveDual', _solveDual)
+    for p, (a, b, rows) in enumerate(pairs):
+        K_pair = cache.get((name, name, kernel, gamma_value, 'pair', p),
+                           lambda: kernelMatrix(kernel, data[rows], data[rows], gamma_value))
+        y_pair = np.where(y[rows] == classes[a], 1.0, -1.0)
+        # (support, coefficients, rho) of every C, the support indexing rows
+        models = []
+        alpha = np.zeros(len(rows))
+        previous_C = None
+        for k, C in enumerate(cvals):
+            start = time.perf_counter()
+            if not warm_start or previous_C is None:
+                alpha = np.zeros(len(rows))
+            elif C < previous_C:
+                alpha = alpha * (C / previous_C)
+            alpha, rho, n_iter = solveDual(K_pair, y_pair, C, alpha)
+            previous_C = C
+            results[k]['fit_time'] += time.perf_counter() - start
+            results[k]['iterations'] += n_iter
+            support = np.flatnonzero(alpha)
+            models.append((support, alpha[support] * y_pair[support], rho))
+
+        # Score against the support vectors of the pair's whole path at once
+        support = np.unique(np.concatenate([model[0] for model in models]))
+        columns = [np.searchsorted(support, model[0]) for model in models]
+        chunk = max(1, min(PREDICT_BATCH_SIZE, cache.budget // (8 * max(support.size, 1))))
+        for i, (set_name, set_data, set_label) in enumerate(eval_sets):
+            for first in range(0, set_data.shape[0], chunk):
+                last = min(first + chunk, set_data.shape[0])
+                K_set = kernelMatrix(kernel, set_data[first:last], data[rows[support]], gamma_value)
+                for k, ((_, coef, rho), cols) in enumerate(zip(models, columns)):
+                    decisions[k][i][first:last, p] = K_set[:, cols].dot(coef) - rho
+
+    for k, result in enumerate(results):
+        for (set_name, set_data, set_label), decision in zip(eval_sets, decisions[k]):
+            result[set_name + '_accuracy'] = accuracy(set_label, classes[_ovoVote(decision, n_class)])
+    if verify:
+        configs = expandGrid({'kernel': [kernel], 'gamma': [gamma], 'C': list(cvals)})
+        for result, independent in zip(results, sweepSVC(data, label, configs, eval_sets, name, cache)):
+            result['independent_fit_time'] = independent['fit_time']
+            for set_name, set_data, set_label in eval_sets:
+                result[set_name + '_independent_accuracy'] = independent[set_name + '_accuracy']
+    return results
+
+
+def formatTable(results, columns):
+    """Formats a list of result dicts as a fixed-width text table"""
+    lines = [' '.join('%14s' % column for column in columns)]
+    for result in results:
+        cells = []
+        for column in columns:
+            value = result.get(column, '-')
+            cells.append('%14.4g' % value if isinstance(value, float) else '%14s' % (value,))
+        lines.append(' '.join(cells))
+    return '\n'.join(lines)
+
+
+def expandGrid(grid):
+    """
+     expandGrid turns a grid such as {'kernel': ['rbf'], 'gamma': [0.1, 'auto'],
+     'C': [1, 10]} (or a list of such grids) into the list of configuration
+     dicts sweepSVC and runSweep take. gamma is dropped for linear kernels.
+    """
+    if isinstance(grid, dict):
+        grid = [grid]
+    configs = []
+    for part in grid:
+        names = sorted(part)
+        for values in itertools.product(*(part[name] for name in names)):
+            config = dict(zip(names, values))
+            if config.get('kernel') == 'linear':
+                config.pop('gamma', None)
+            if config not in configs:
+                configs.append(config)
+    return configs
+
+
+def dataDigest(*matrices):
+    """SHA-256 of the content, dtype and shape of dense or scipy.sparse matrices"""
+    digest = hashlib.sha256()
+    for X in matrices:
+        parts = [X.data, X.indices, X.indptr] if isSparse(X) else [X]
+        digest.update(json.dumps([type(X).__name__, np.dtype(X.dtype).str, list(X.shape)]).encode())
+        for part in parts:
+            digest.update(np.ascontiguousarray(part))
+    return digest.hexdigest()
+
+
+def configKey(config, name, data, eval_names=None, digest=None):
+    """
+    Identifies a (configuration, training set, evaluation sets) in a results
+    file; digest, a dataDigest of the data and labels, tells apart different
+    data of the same shape
+    """
+    return json.dumps({'name': name, 'shape': list(data.shape), 'config': config,
+                       'eval': list(eval_names or [name]), 'digest': digest}, sort_keys=True)
+
+
+def estimateFitMemory(data, cache_size_mb=200):
+    """
+     Rough upper bound, in bytes, of the memory one SVC fit on data needs:
+     libsvm's copy of the data, its kernel cache and the dual variables.
+    """
+    if isSparse(data):
+        # libsvm's sparse nodes hold an index and a value per non-zero
+        data_bytes = data.nnz * 16 + data.shape[0] * 16
+    else:
+        data_bytes = data.shape[0] * data.shape[1] * 8
+    return data_bytes + cache_size_mb * 1024 * 1024 + data.shape[0] * 64
+
+
+def availableMemory():
+    """Bytes of physical memory currently available, or None if unknown"""
+    try:
+        return os.sysconf('SC_AVPHYS_PAGES') * os.sysconf('SC_PAGE_SIZE')
+    except (ValueError, OSError, AttributeError):
+        return None
+
+
+def _fitShared(paths, config, cache_size_mb):
+    # Runs in a worker process: the data is mapped, not unpickled
+    from sklearn.svm import SVC
+
+    data, y = loadMatrix(paths[0][1]), np.ravel(loadMatrix(paths[0][2]))
+    clf = SVC(C=config['C'], kernel=config['kernel'], gamma=config.get('gamma', 'auto'),
+              cache_size=cache_size_mb, decision_function_shape='ovo')
+
+    result = dict(config)
+    start = time.perf_counter()
+    clf.fit(data, y)
+    result['fit_time'] = time.perf_counter() - start
+
+    result['predict_time'] = 0.0
+    for set_name, data_path, label_path in paths[1:]:
+        start = time.perf_counter()
+        predictions, decision = predictBatched(clf, loadMatrix(data_path))
+        elapsed = time.perf_counter() - start
+        result[set_name + '_predict_time'] = elapsed
+        result['predict_time'] += elapsed
+        result[set_name + '_accuracy'] = accuracy(loadMatrix(label_path), predictions)
+    return result
+
+
+def readResults(results_path):
+    """Returns {key: result} for every complete line of a results file"""
+    done = {}
+    if not os.path.exists(results_path):
+        return done
+    with open(results_path) as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                # A line cut short by an interrupted write
+                continue
+            done[record['key']] = record
+    return done
+
+
+def _endsWithNewline(path):
+    with open(path, 'rb') as f:
+        f.seek(-1, os.SEEK_END)
+        return f.read(1) == b'\n'
+
+
+def runSweep(data, label, configs, results_path, eval_sets=None, name='train', n_jobs=None,
+             memory_limit_mb=None, cache_size_mb=200):
+    """
+     runSweep fits SVC once for each configuration on (data, label) on a pool
+     of worker processes, and scores every evaluation set with that fitted
+     model.
+
+     Input:
+         data: the training data matrix of size N x D (dense or scipy.sparse)
+         label: vector of size N (or N x 1) of class labels
+         configs: list of configuration dicts, e.g. from expandGrid
+         results_path: JSON-lines file each result is appended to as soon as
+         its fit finishes; configurations already recorded there for this
+         name, evaluation sets and content of the data and labels are not
+         fitted again
+         eval_sets: list of (set_name, data, label) to score; default is the
+         training data alone, under name
+         name: identifies data in the results file
+         n_jobs: maximum number of concurrent fits (default: CPU count)
+         memory_limit_mb: memory the concurrent fits may use together
+         (default: the physical memory currently available)
+         cache_size_mb: libsvm kernel cache of each fit
+
+     Output:
+         results: list of result dicts in the order of configs, with the same
+         keys as sweepSVC's (except 'precomputed') plus 'key' and 'name'
+    """
+    eval_sets = _evalSets(data, label, eval_sets, name)
+    eval_names = [set_name for set_name, set_data, set_label in eval_sets]
+    done = readResults(results_path)
+    digest = dataDigest(data, np.ravel(label), *[matrix for set_name, set_data, set_label in eval_sets
+                                                 for matrix in (set_data, np.ravel(set_label))])
+    keys = [configKey(config, name, data, eval_names, digest) for config in configs]
+    pending = [(key, config) for key, config in zip(keys, configs) if key not in done]
+
+    if pending:
+        if n_jobs is None:
+            n_jobs = os.cpu_count() or 1
+        budget = memory_limit_mb * 1024 * 1024 if memory_limit_mb is not None else availableMemory()
+        if budget is not None:
+            n_jobs = max(1, min(n_jobs, int(budget // estimateFitMemory(data, cache_size_mb))))
+
+        shared_dir = tempfile.mkdtemp(prefix='sweep-')
+        try:
+            paths = []
+            for i, (set_name, set_data, set_label) in enumerate([(name, data, label)] + eval_sets):
+                data_path = os.path.join(shared_dir, 'X%d' % i)
+                label_path = os.path.join(shared_dir, 'y%d' % i)
+                saveMatrix(data_path, set_data)
+                saveMatrix(label_path, np.ravel(set_label))
+                paths.append((set_name, data_path, label_path))
+            with ProcessPoolExecutor(max_workers=n_jobs) as pool, open(results_path, 'a') as out:
+                if out.tell() > 0 and not _endsWithNewline(results_path):
+                    # Terminate a line cut short by an interrupted run
+                    out.write('\n')
+                running = dict((pool.submit(_fitShared, paths, config, cache_size_mb), key)
+                               for key, config in pending)
+                while running:
+                    finished, _ = wait(running, return_when=FIRST_COMPLETED)
+                    for future in finished:
+                        key = running.pop(future)
+                        result = future.result()
+                        result['key'] = key
+                        result['name'] = name
+                        out.write(json.dumps(result) + '\n')
+                        out.flush()
+                        os.fsync(out.fileno())
+                        done[key] = result
+        finally:
+            shutil.rmtree(shared_dir, ignore_errors=True)
+
+    return [done[key] for key in keys]
@@ -0,0 +1,205 @@
+"""
+Training of the logistic models with the optimizers of solvers.py
+
+trainOneVsAll fits the ten one-vs-all classifiers serially, on threads, on
+worker processes that memory-map the training matrix, or jointly in one
+minimize run. scipy is imported on the first fit. Each fit can be scored on
+the validation split as it trains, stop once its validation loss stops
+improving, and checkpoint its weights (see callbacks.py).
+"""
+import os
+import shutil
+import tempfile
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+import numpy as np
+
+from . import profiling
+from .callbacks import EarlyStopping, blrValidation, blrValidationJoint
+from .data import DesignMatrix, designMatrix
+from .matrix_io import loadMatrix, saveMatrix
+from .objectives import blrObjFunction, blrObjFunctionJoint
+from .solvers import gradientTolerance, solve, solverOptions
+
+
+def _minimize(name, objective, initialWeights, args, opts, solver='cg', stopper=None, **attrs):
+    # solve with a span for the run and call statistics for the objective;
+    # a stopper (callbacks.EarlyStopping) resumes from its checkpoint and
+    # ends the run on a validation plateau
+    with profiling.span('minimize', objective=name, solver=solver, **attrs) as span_attrs:
+        opts = solverOptions(solver, opts)
+        if stopper is None:
+            nn_params = solve(objective, initialWeights, args, solver=solver, opts=opts, name=name)
+        else:
+            initialWeights, opts = stopper.start(initialWeights, opts)
+            if stopper.done:
+                nn_params = stopper.result(initialWeights)
+            else:
+                n_start = 0
+                if 'rtol' in opts:
+                    # Fix the tolerance at the initial weights, where the
+                    # checkpoint keeps it for a resumed run
+                    rtol = opts.pop('rtol')
+                    opts['gtol'] = stopper.gtol = gradientTolerance(objective, initialWeights, args, solver,
+                                                                    rtol, name)
+                    n_start = 1
+                nn_params = stopper.finish(solve(objective, initialWeights, args, solver=solver, opts=opts,
+                                                 callback=stopper, name=name),
+                                           profiling.timed(name, objective), args)
+                nn_params.nfev += n_start
+            span_attrs.update(stopped_at=nn_params.stopped_at, resumed_from=nn_params.resumed_from)
+        span_attrs.update(nit=int(nn_params.nit), nfev=int(nn_params.nfev), nhev=nn_params.nhev,
+                          fun=float(nn_params.fun), converged=bool(nn_params.success))
+    return nn_params
+
+
+def _stopper(evaluate, early_stopping, checkpoint):
+    # The EarlyStopping for one fit: early_stopping holds its options, and a
+    # checkpoint alone only saves the weights every 5 iterations
+    if early_stopping is None and checkpoint is None:
+        return None
+    if early_stopping is None:
+        return EarlyStopping(checkpoint=checkpoint)
+    if evaluate is None:
+        raise ValueError("early stopping needs validation data")
+    return EarlyStopping(evaluate, checkpoint=checkpoint, **early_stopping)
+
+
+def _fitBinary(train_data, labeli, opts, k=None, solver='cg', validation=None, early_stopping=None,
+               checkpoint_dir=None):
+    initialWeights = np.zeros(train_data.shape[1] + 1)
+    args = (train_data, labeli)
+    evaluate = None
+    if validation is not None:
+        evaluate = blrValidation(validation[0], np.ravel(validation[1]) == k)
+    checkpoint = os.path.join(checkpoint_dir, 'class_%d.npz' % k) if checkpoint_dir else None
+    nn_params = _minimize('blrObjFunction', blrObjFunction, initialWeights, args, opts, solver,
+                          _stopper(evaluate, early_stopping, checkpoint), label=k)
+    return nn_params.x
+
+
+def _fitBinaryShared(data_path, label_path, k, opts, trace=False, solver='cg', validation_paths=None,
+                     early_stopping=None, checkpoint_dir=None):
+    # Runs in a worker process: the data is mapped, not unpickled. With
+    # trace, the worker's spans are returned for the parent to merge.
+    if trace:
+        profiling.enable()
+    X = loadMatrix(data_path)
+    Y = loadMatrix(label_path)
+    validation = None
+    if validation_paths is not None:
+        validation = (DesignMatrix(loadMatrix(validation_paths[0]), augmented=True),
+                      loadMatrix(validation_paths[1]))
+    w = _fitBinary(DesignMatrix(X, augmented=True), Y[:, k:k + 1], opts, k, solver, validation, early_stopping,
+                   checkpoint_dir)
+    return w, (profiling.exportState() if trace else None)
+
+
+def _matrixPath(X):
+    """
+    Returns the loadMatrix path of the .npy file X was memory-mapped from
+    (e.g. by the preprocess cache) if X is that whole file, so workers can
+    map it directly; None otherwise.
+    """
+    if not isinstance(X, np.memmap) or not X.filename or not X.flags['C_CONTIGUOUS']:
+        return None
+    whole = np.load(X.filename, mmap_mode='r')
+    if whole.shape != X.shape or whole.dtype != X.dtype or not X.filename.endswith('.npy'):
+        return None
+    return X.filename[:-len('.npy')]
+
+
+def trainOneVsAll(train_data, Y, opts=None, n_jobs=1, executor='process', joint=False, solver='cg',
+                  validation=None, early_stopping=None, checkpoint_dir=None):
+    """
+     trainOneVsAll fits one binary Logistic Regression classifier per class
+     with blrObjFunction and collects the weights into W.
+
+     Input:
+         train_data: the data matrix of size N x D, or a DesignMatrix
+         Y: the label matrix of size N x n_class where column k is 1 for the
+         rows of class k and 0 elsewhere
+         opts: options updating the solver's defaults (see solvers.py;
+         {'maxiter': 100} for cg)
+         n_jobs: number of classes trained concurrently; 1 trains serially
+         executor: 'process' to train in worker processes that share the
+         training matrix through a memmap, or 'thread' to train in threads
+         that share it directly
+         joint: if True, ignore n_jobs and executor and fit every class in a
+         single minimize run over blrObjFunctionJoint, which reads the data
+         once per evaluation instead of once per class
+         solver: the optimizer, a key of solvers.SOLVERS; the default 'cg'
+         runs the fixed iteration budget, the others stop on convergence
+         validation: (validation_data, validation_label), the labels being
+         the N x 1 class of each row, to score the classifiers on for
+         early stopping
+         early_stopping: options of callbacks.EarlyStopping, such as
+         {'every': 5, 'patience': 3}, to stop each fit once its validation
+         loss stops improving; needs validation
+         checkpoint_dir: directory to checkpoint the weights in during
+         training; a run given the directory of a killed run resumes it
+
+     Output:
+         W: the matrix of weight of size (D + 1) x n_class, in class order.
+         The result is the same whatever n_jobs and executor are. The joint
+         fit shares one line search across classes, so it reaches the same
+         optimum but not bit-identical weights after a fixed maxiter.
+    """
+    if early_stopping is None:
+        validation = None
+    n_feature = train_data.shape[1]
+    n_class = Y.shape[1]
+    W = np.zeros((n_feature + 1, n_class))
+
+    if joint:
+        initialWeights = np.zeros((n_feature + 1) * n_class)
+        args = (train_data, np.asarray(Y, dtype=np.float64))
+        evaluate = blrValidationJoint(*validation) if validation is not None else None
+        checkpoint = os.path.join(checkpoint_dir, 'joint.npz') if checkpoint_dir else None
+        nn_params = _minimize('blrObjFunctionJoint', blrObjFunctionJoint, initialWeights, args, opts, solver,
+                              _stopper(evaluate, early_stopping, checkpoint))
+        return nn_params.x.reshape((n_feature + 1, n_class))
+
+    if n_jobs == 1:
+        for k in range(n_class):
+            W[:, k] = _fitBinary(train_data, Y[:, k:k + 1], opts, k, solver, validation, early_stopping,
+                                 checkpoint_dir)
+        return W
+
+    if executor == 'thread':
+        with ThreadPoolExecutor(max_workers=n_jobs) as pool:
+            futures = [pool.submit(_fitBinary, train_data, Y[:, k:k + 1], opts, k, solver, validation,
+                                   early_stopping, checkpoint_dir) for k in range(n_class)]
+            for k, future in enumerate(futures):
+                W[:, k] = future.result()
+        return W
+
+    if executor != 'process':
+        raise ValueError("executor must be 'process' or 'thread', got %r" % (executor,))
+
+    shared_dir = tempfile.mkdtemp(prefix='ovr-')
+    try:
+        X = designMatrix(train_data)
+        data_path = _matrixPath(X)
+        if data_path is None:
+            data_path = os.path.join(shared_dir, 'X')
+            saveMatrix(data_path, X)
+        label_path = os.path.join(shared_dir, 'Y')
+        saveMatrix(label_path, np.asarray(Y, dtype=np.float64))
+        validation_paths = None
+        if validation is not None:
+            validation_paths = (os.path.join(shared_dir, 'validation_X'),
+                                os.path.join(shared_dir, 'validation_label'))
+            saveMatrix(validation_paths[0], designMatrix(validation[0]))
+            saveMatrix(validation_paths[1], np.asarray(validation[1]))
+        trace = profiling.enabled()
+        with ProcessPoolExecutor(max_workers=n_jobs) as pool:
+            futures = [pool.submit(_fitBinaryShared, data_path, label_path, k, opts, trace, solver,
+                                   validation_paths, early_stopping, checkpoint_dir) for k in range(n_class)]
+            for k, future in enumerate(futures):
+                W[:, k], state = future.result()
+                if state is not None:
+                    profiling.merge(state)
+    finally:
+        shutil.rmtree(shared_dir, ignore_errors=True)
+    return W